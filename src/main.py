@@ -1,15 +1,153 @@
+import argparse
+import os
 import pygame
+import statistics
 import sys
 import time
+import threading
 import tracemalloc
-import copy
-from maze_generator import Maze, highlight_cell
-from search_algorithms.dfs import solve_dfs
-from search_algorithms.bfs import solve_bfs
-from search_algorithms.astar import solve_astar
+import psutil
+from maze_generator import Maze, animate_path, animate_search
+from search_algorithms.dfs import search_dfs, search_dfs_bidir
+from search_algorithms.bfs import search_bfs
+from search_algorithms.astar import search_astar
+from search_algorithms.portfolio import finish_portfolio, portfolio_pool, search_portfolio
 from utils import log_result, compare_algorithms
-from mdp_algorithms.policy_iteration import policy_iteration
-from mdp_algorithms.value_iteration import value_iteration
+from mdp_algorithms.policy_iteration import compute_policy_iteration
+from mdp_algorithms.value_iteration import compute_value_iteration
+
+# Memory is measured as the peak RSS growth during a run, sampled on a
+# background thread. tracemalloc gives exact Python allocation peaks but slows
+# allocation-heavy algorithms down considerably, so it is opt-in.
+USE_TRACEMALLOC = False
+RSS_SAMPLE_INTERVAL = 0.01  # seconds between RSS samples (100 Hz)
+
+class PeakRSSSampler:
+    """Track the peak resident set size of this process while a run executes."""
+    def __init__(self, interval=RSS_SAMPLE_INTERVAL):
+        self.interval = interval
+        self.process = psutil.Process()
+        self.baseline = self.peak = self.process.memory_info().rss
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, self.process.memory_info().rss)
+
+    def stop(self):
+        """Stop sampling and return the peak RSS growth over the baseline in MB."""
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, self.process.memory_info().rss)
+        return max(0, self.peak - self.baseline) / (1024 * 1024)
+
+def start_memory_measurement():
+    """Begin measuring memory for a run; pass the result to stop_memory_measurement."""
+    if USE_TRACEMALLOC:
+        tracemalloc.start()
+        return None
+    return PeakRSSSampler()
+
+def stop_memory_measurement(sampler):
+    """Finish a measurement started by start_memory_measurement and return the peak usage in MB."""
+    if sampler is None:
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return peak / (1024 * 1024)
+    return sampler.stop()
+
+# Number of timed runs per algorithm: one for interactive runs, BENCH_N_REPEAT
+# under --bench, or whatever the MAZE_N_REPEAT environment variable sets. With
+# more than one, an untimed warm-up run (JIT compilation, caches) is done first
+# and the median of the timed runs is reported.
+BENCH_N_REPEAT = 5
+N_REPEAT = max(1, int(os.environ.get("MAZE_N_REPEAT", "1")))
+
+def time_solver(solve, n_repeat=None, reset=None):
+    """
+    Call solve() n_repeat times (N_REPEAT by default), timing each call with
+    time.perf_counter_ns. If given, reset() is called before every call,
+    outside the timing.
+    Returns (metrics of the last call, median execution time in seconds).
+    """
+    if n_repeat is None:
+        n_repeat = N_REPEAT
+    if n_repeat > 1:
+        if reset is not None:
+            reset()
+        solve()
+    samples = []
+    for _ in range(n_repeat):
+        if reset is not None:
+            reset()
+        start_ns = time.perf_counter_ns()
+        metrics = solve()
+        samples.append(time.perf_counter_ns() - start_ns)
+    return metrics, statistics.median(samples) / 1e9
+
+BENCH_SEED = 0  # Maze seed used by --bench when --seed is not given
+
+# Result summaries of the current maze's runs, printed together by print_results
+# so stdout writes stay out of the timed runs.
+RESULTS = []
+
+def format_result(result):
+    """Format one RESULTS entry as the console summary line for that run."""
+    kind, algorithm, execution_time, steps_taken, memory_usage, second_metric, third_metric = result
+    if steps_taken is None:
+        steps_taken = "no path"
+    memory_usage = "not measured" if memory_usage is None else f"{memory_usage:.4f} MB"
+    if kind == "MDP":
+        return (f"{algorithm}: Execution Time: {execution_time:.4f} s, Steps: {steps_taken}, Memory Usage: {memory_usage}, "
+                f"Iteration Count\\Policy Improvement Count: {second_metric}, Total Evaluation Iteration: {third_metric}")
+    return (f"{algorithm}: Execution Time: {execution_time:.4f} s, Steps: {steps_taken}, Memory Usage: {memory_usage}, "
+            f"Nodes Expanded: {second_metric}, Max Frontier Size: {third_metric}")
+
+def print_results():
+    """Write all pending run summaries to stdout in one call and clear them."""
+    if RESULTS:
+        sys.stdout.write("\n".join(format_result(result) for result in RESULTS) + "\n")
+        sys.stdout.flush()
+        RESULTS.clear()
+
+def parse_args():
+    """Parse the command line options."""
+    global N_REPEAT
+    parser = argparse.ArgumentParser(description="Maze Generator and Search Visualizer")
+    parser.add_argument("--no-pause", action="store_true",
+                        help="Skip the one second pause between algorithms in the ALL run modes.")
+    parser.add_argument("--bench", action="store_true",
+                        help="Benchmark mode: generate the maze without animation from a fixed seed "
+                             f"(default {BENCH_SEED}), skip the algorithm animations and the pauses between them, and "
+                             f"time each algorithm as the median of {BENCH_N_REPEAT} runs after a warm-up run "
+                             "(MAZE_N_REPEAT overrides the count).")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="Seed for maze generation, so runs can be repeated on the same maze.")
+    parser.add_argument("--exact-mdp", action="store_true",
+                        help="Solve the MDP algorithms in closed form with one BFS from the goal "
+                             "instead of iterating (their iteration counts are then logged as 0).")
+    parser.add_argument("--direct-eval", action="store_true",
+                        help="Evaluate each Policy Iteration policy exactly, by following each state's "
+                             "chain of policy moves, instead of sweeping to convergence.")
+    parser.add_argument("--integer-vi", action="store_true",
+                        help="Run Value Iteration on integer step distances until they stop changing "
+                             "instead of float values until theta.")
+    parser.add_argument("--parallel-vi", action="store_true",
+                        help="Run Value Iteration as double-buffered sweeps split across all cores "
+                             "(needs Numba to run in parallel).")
+    parser.add_argument("--prioritized-vi", action="store_true",
+                        help="Run Value Iteration as prioritized sweeping (single-state backups from a "
+                             "worklist); its iteration count is then the number of backups.")
+    parser.add_argument("--bidir-dfs", action="store_true",
+                        help="Run DFS from both ends at once, stopping where the two searches meet.")
+    args = parser.parse_args()
+    if args.bench and args.seed is None:
+        args.seed = BENCH_SEED
+    if args.bench and "MAZE_N_REPEAT" not in os.environ:
+        N_REPEAT = BENCH_N_REPEAT
+    return args
 
 def get_maze_dimensions():
     """
@@ -37,9 +175,8 @@ def choose_run_mode():
       - 6: Value Iteration (MDP)
       - 7: ALL MDP algorithms
       - 8: ALL algorithms (classical + MDP)
+      - 9: Portfolio race of the classical search algorithms
     """
-    choosing = True
-    mode = None
     print("Choose run mode:")
     print("  1: DFS")
     print("  2: BFS")
@@ -49,106 +186,188 @@ def choose_run_mode():
     print("  6: Value Iteration (MDP)")
     print("  7: ALL MDP algorithms")
     print("  8: ALL algorithms (classical + MDP)")
-    while choosing:
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit(); sys.exit()
-            if event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_1:
-                    mode = "DFS"; choosing = False
-                elif event.key == pygame.K_2:
-                    mode = "BFS"; choosing = False
-                elif event.key == pygame.K_3:
-                    mode = "ASTAR"; choosing = False
-                elif event.key == pygame.K_4:
-                    mode = "ALL_CLASSICAL"; choosing = False
-                elif event.key == pygame.K_5:
-                    mode = "POLICY"; choosing = False
-                elif event.key == pygame.K_6:
-                    mode = "VALUE"; choosing = False
-                elif event.key == pygame.K_7:
-                    mode = "ALL_MDP"; choosing = False
-                elif event.key == pygame.K_8:
-                    mode = "ALL_ALL"; choosing = False
-    return mode
+    print("  9: Portfolio (race DFS, BFS and A*, keep the first to finish)")
+    modes = {
+        pygame.K_1: "DFS",
+        pygame.K_2: "BFS",
+        pygame.K_3: "ASTAR",
+        pygame.K_4: "ALL_CLASSICAL",
+        pygame.K_5: "POLICY",
+        pygame.K_6: "VALUE",
+        pygame.K_7: "ALL_MDP",
+        pygame.K_8: "ALL_ALL",
+        pygame.K_9: "PORTFOLIO",
+    }
+    # Block on the event queue instead of polling it
+    while True:
+        event = pygame.event.wait()
+        if event.type == pygame.QUIT:
+            pygame.quit(); sys.exit()
+        if event.type == pygame.KEYDOWN and event.key in modes:
+            return modes[event.key]
 
 def wait_for_restart():
     """
     After completing the search animations, wait for the user to press a key.
     Press ESC to quit, or any other key to generate a new maze.
     """
-    waiting = True
     print("Press any key to generate a new maze, or press ESC to quit.")
-    while waiting:
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
+    while True:
+        event = pygame.event.wait()
+        if event.type == pygame.QUIT:
+            pygame.quit(); sys.exit()
+        if event.type == pygame.KEYDOWN:
+            if event.key == pygame.K_ESCAPE:
                 pygame.quit(); sys.exit()
-            if event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_ESCAPE:
-                    pygame.quit(); sys.exit()
-                else:
-                    waiting = False
-                    break
-
-def run_algorithm(algorithm, maze, win, rows, cols):
+            break
+
+def run_algorithm(algorithm, maze, win, rows, cols, bidir_dfs=False):
     """
-    Run a classical search algorithm (DFS, BFS, or A*) on a deep copy of the maze.
-    Measures execution time, memory usage, and returns a tuple:
-    (steps_taken, nodes_expanded, max_frontier_size).
+    Run a classical search algorithm (DFS, BFS, or A*) on the maze, restoring its
+    state from a snapshot afterwards.
+    Measures execution time of the search alone (median over N_REPEAT runs) and
+    memory usage, then replays the search on win (skipped if win is None).
+    Returns a tuple: (steps_taken, nodes_expanded, max_frontier_size).
+    With bidir_dfs=True, DFS searches from both ends until they meet.
     """
-    maze_copy = copy.deepcopy(maze)
-    start_time = time.time()
-    tracemalloc.start()
+    snap = maze.snapshot()
+    sampler = start_memory_measurement()
     
-    if algorithm == "DFS":
-        metrics = solve_dfs(maze_copy, win)
-    elif algorithm == "BFS":
-        metrics = solve_bfs(maze_copy, win)
-    elif algorithm == "ASTAR":
-        metrics = solve_astar(maze_copy, win)
-    else:
-        metrics = (None, None, None)
+    try:
+        if algorithm == "DFS":
+            search = search_dfs_bidir if bidir_dfs else search_dfs
+            result, execution_time = time_solver(lambda: search(maze))
+        elif algorithm == "BFS":
+            result, execution_time = time_solver(lambda: search_bfs(maze))
+        elif algorithm == "ASTAR":
+            result, execution_time = time_solver(lambda: search_astar(maze))
+        else:
+            result, execution_time = None, 0.0
+    finally:
+        maze.restore(snap)
     
-    execution_time = time.time() - start_time
-    current, peak = tracemalloc.get_traced_memory()
-    tracemalloc.stop()
-    memory_usage = peak / (1024 * 1024)  # in MB
+    memory_usage = stop_memory_measurement(sampler)  # in MB
+
+    if result is None:
+        metrics = (None, None, None)
+    else:
+        steps_taken, path, steps, nodes_expanded, max_frontier_size = result
+        metrics = (steps_taken, nodes_expanded, max_frontier_size)
+        if win is not None:
+            animate_search(win, maze, steps, path)
 
     steps_taken, nodes_expanded, max_frontier_size = metrics
     log_result(algorithm, (rows, cols), execution_time, steps_taken, memory_usage, nodes_expanded, max_frontier_size)
-    print(f"{algorithm}: Execution Time: {execution_time:.4f} s, Steps: {steps_taken}, Memory Usage: {memory_usage:.4f} MB, Nodes Expanded: {nodes_expanded}, Max Frontier Size: {max_frontier_size}")
+    RESULTS.append(("CLASSICAL", algorithm, execution_time, steps_taken, memory_usage, nodes_expanded, max_frontier_size))
     return metrics
 
-def run_mdp_algorithm(algorithm, maze, win, rows, cols):
+def run_portfolio(maze, win, rows, cols):
+    """
+    Race DFS, BFS and A* on the maze in separate processes and keep the first to
+    finish (see search_algorithms.portfolio). The worker processes are started
+    once, by an untimed race, and reused by the timed ones; the execution time
+    is that of the whole race. The winner's path is then animated on win
+    (skipped if win is None) while the other searches finish, and is logged
+    as "PORTFOLIO:<algorithm>"; the other searches are logged as
+    "PORTFOLIO:<algorithm>:lost" with the search time inside their worker, or
+    "PORTFOLIO:<algorithm>:cancelled" if they never ran.
+    The searches run in the worker processes, so this process's memory says
+    nothing about them and every row is logged with no memory usage.
+    Returns a tuple: (steps_taken, nodes_expanded, max_frontier_size) of the winner.
+    """
+    pool = portfolio_pool()
+    races = []
+
+    def race():
+        races.append(search_portfolio(maze, pool))
+        return races[-1]
+
+    def settle():
+        # Let the losers of the previous race finish, so each race starts on idle workers.
+        if races:
+            finish_portfolio(races[-1][1])
+
+    try:
+        race()
+        (result, losers), execution_time = time_solver(race, reset=settle)
+        winner, _, steps_taken, path, nodes_expanded, max_frontier_size = result
+        # The losing searches keep running while the winner's path is shown,
+        # and are only waited for afterwards, to log their results.
+        if win is not None:
+            animate_path(win, maze, path)
+        outcomes = finish_portfolio(losers)
+    finally:
+        pool.shutdown(cancel_futures=True)
+
+    entries = [(f"PORTFOLIO:{winner}", execution_time, steps_taken, nodes_expanded, max_frontier_size)]
+    for algorithm, outcome in outcomes:
+        if outcome is None:
+            entries.append((f"PORTFOLIO:{algorithm}:cancelled", 0.0, None, None, None))
+        else:
+            _, search_time, loser_steps, _, loser_expanded, loser_frontier = outcome
+            entries.append((f"PORTFOLIO:{algorithm}:lost", search_time, loser_steps, loser_expanded, loser_frontier))
+    for algorithm, run_time, steps, expanded, frontier in entries:
+        log_result(algorithm, (rows, cols), run_time, steps, None, expanded, frontier)
+        RESULTS.append(("CLASSICAL", algorithm, run_time, steps, None, expanded, frontier))
+    return steps_taken, nodes_expanded, max_frontier_size
+
+def run_mdp_algorithm(algorithm, maze, win, rows, cols, exact=False, direct=False, integer=False,
+                      parallel=False, prioritized=False):
     """
-    Run an MDP algorithm (Policy or Value Iteration) on a deep copy of the maze.
-    Measures execution time, memory usage, and then extracts and animates the optimal path.
+    Run an MDP algorithm (Policy or Value Iteration) on the maze, restoring its
+    state from a snapshot afterwards.
+    Measures execution time of the solve alone (median over N_REPEAT runs) and
+    memory usage, then animates the optimal path on win (skipped if win is None).
+    If the resulting policy does not lead to the goal, steps_taken is None and
+    the run is reported as having no path.
     Returns a tuple:
       - For VALUE: (steps_taken, value_iter_count, 0)
       - For POLICY: (steps_taken, policy_improvement_count, total_evaluation_iterations)
+    With exact=True both algorithms use the closed-form BFS solution; direct=True
+    makes Policy Iteration evaluate each policy exactly, and
+    integer=True makes Value Iteration iterate on integer step distances,
+    parallel=True makes it run multi-threaded double-buffered sweeps and
+    prioritized=True makes it run worklist-driven single-state backups.
     """
-    maze_copy = copy.deepcopy(maze)
-    start_time = time.time()
-    tracemalloc.start()
+    snap = maze.snapshot()
+    sampler = start_memory_measurement()
     
-    if algorithm == "POLICY":
-        metrics = policy_iteration(maze_copy, win, gamma=0.9, theta=1e-4)
-    elif algorithm == "VALUE":
-        metrics = value_iteration(maze_copy, win, gamma=0.9, theta=1e-4)
-    else:
-        metrics = (None, None, None)
+    try:
+        if algorithm == "POLICY":
+            result, execution_time = time_solver(lambda: compute_policy_iteration(maze, gamma=0.9, theta=1e-4, exact=exact, direct=direct))
+        elif algorithm == "VALUE":
+            result, execution_time = time_solver(lambda: compute_value_iteration(
+                maze, gamma=0.9, theta=1e-4, exact=exact, integer=integer, parallel=parallel, prioritized=prioritized))
+        else:
+            result, execution_time = None, 0.0
+    finally:
+        maze.restore(snap)
     
-    execution_time = time.time() - start_time
-    current, peak = tracemalloc.get_traced_memory()
-    tracemalloc.stop()
-    memory_usage = peak / (1024 * 1024)
+    memory_usage = stop_memory_measurement(sampler)
     
+    if result is None:
+        metrics = (None, None, None)
+    else:
+        path, second_metric, third_metric = result
+        # A policy that never reaches the goal has no path to count or animate.
+        if path is None:
+            metrics = (None, second_metric, third_metric)
+        else:
+            metrics = (len(path), second_metric, third_metric)
+            if win is not None:
+                animate_path(win, maze, path)
+
     steps_taken, second_metric, third_metric = metrics
     log_result(algorithm, (rows, cols), execution_time, steps_taken, memory_usage, second_metric, third_metric)
-    print(f"{algorithm}: Execution Time: {execution_time:.4f} s, Steps: {steps_taken}, Memory Usage: {memory_usage:.4f} MB, Iteration Count\Policy Improvement Count: {second_metric}, Total Evaluation Iteration: {third_metric}")
+    RESULTS.append(("MDP", algorithm, execution_time, steps_taken, memory_usage, second_metric, third_metric))
     return metrics
 
 def main():
+    args = parse_args()
+    interactive = not (args.no_pause or args.bench)
+    # Solver variants selected on the command line, passed to every MDP run
+    mdp_options = dict(exact=args.exact_mdp, direct=args.direct_eval, integer=args.integer_vi,
+                       parallel=args.parallel_vi, prioritized=args.prioritized_vi)
     rows, cols = get_maze_dimensions()
     cell_size = 30  # cell size in pixels
     width = cols * cell_size
@@ -160,35 +379,45 @@ def main():
 
     while True:
         # Generate one maze instance for all runs.
-        maze = Maze(rows, cols, cell_size)
-        maze.generate_maze(win)
+        maze = Maze(rows, cols, cell_size, rng_seed=args.seed)
+        maze.generate_maze(win, animate=not args.bench)
 
         mode = choose_run_mode()
 
         # Clear window and redraw the maze.
         maze.draw(win)
         pygame.display.update()
+        # Window the runs are animated on; benchmarks only collect the results.
+        run_win = None if args.bench else win
 
         if mode == "ALL_CLASSICAL":
             for alg in ["DFS", "BFS", "ASTAR"]:
-                run_algorithm(alg, maze, win, rows, cols)
-                pygame.time.delay(1000)
+                run_algorithm(alg, maze, run_win, rows, cols, args.bidir_dfs)
+                if interactive:
+                    pygame.time.wait(1000)
         elif mode == "ALL_MDP":
             for alg in ["POLICY", "VALUE"]:
-                run_mdp_algorithm(alg, maze, win, rows, cols)
-                pygame.time.delay(1000)
+                run_mdp_algorithm(alg, maze, run_win, rows, cols, **mdp_options)
+                if interactive:
+                    pygame.time.wait(1000)
         elif mode == "ALL_ALL":
             # Run classical algorithms first, then MDP algorithms.
             for alg in ["DFS", "BFS", "ASTAR"]:
-                run_algorithm(alg, maze, win, rows, cols)
-                pygame.time.delay(1000)
+                run_algorithm(alg, maze, run_win, rows, cols, args.bidir_dfs)
+                if interactive:
+                    pygame.time.wait(1000)
             for alg in ["POLICY", "VALUE"]:
-                run_mdp_algorithm(alg, maze, win, rows, cols)
-                pygame.time.delay(1000)
+                run_mdp_algorithm(alg, maze, run_win, rows, cols, **mdp_options)
+                if interactive:
+                    pygame.time.wait(1000)
         elif mode in ["DFS", "BFS", "ASTAR"]:
-            run_algorithm(mode, maze, win, rows, cols)
+            run_algorithm(mode, maze, run_win, rows, cols, args.bidir_dfs)
         elif mode in ["POLICY", "VALUE"]:
-            run_mdp_algorithm(mode, maze, win, rows, cols)
+            run_mdp_algorithm(mode, maze, run_win, rows, cols, **mdp_options)
+        elif mode == "PORTFOLIO":
+            run_portfolio(maze, run_win, rows, cols)
+
+        print_results()
 
         print(f"\nComparison results for maze size {rows}x{cols}:")
         results = compare_algorithms((rows, cols))
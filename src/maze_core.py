@@ -0,0 +1,90 @@
+import numpy as np
+
+try:
+    from numba import njit, prange
+except ImportError:
+    # Numba is optional; without it the kernels below run as plain Python.
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda func: func
+    prange = range
+
+# ----------------------------- #
+#        Wall Encoding          #
+# ----------------------------- #
+# Each cell's walls are packed into one uint8 of Maze.walls; bit i is set when
+# wall i is present, in the order top, right, bottom, left.
+TOP, RIGHT, BOTTOM, LEFT = 1, 2, 4, 8
+ALL_WALLS = TOP | RIGHT | BOTTOM | LEFT
+
+# Number of set bits in each 4-bit neighbor mask, and the direction (0=top,
+# 1=right, 2=bottom, 3=left) of the i-th set bit of each mask (-1 if none).
+_POPCOUNT = np.array([bin(mask).count("1") for mask in range(16)], dtype=np.int64)
+_NTH_BIT = np.array([[d for d in range(4) if mask & (1 << d)] + [-1] * (4 - _POPCOUNT[mask])
+                     for mask in range(16)], dtype=np.int64)
+
+# Row/column offset of the neighbor in each direction; the wall facing back
+# from that neighbor is direction (d + 2) % 4.
+_DROW = np.array([-1, 0, 1, 0], dtype=np.int64)
+_DCOL = np.array([0, 1, 0, -1], dtype=np.int64)
+
+# ----------------------------- #
+#      Compiled Generation      #
+# ----------------------------- #
+@njit(cache=True)
+def carve(walls, visited, rows, cols, seed):
+    """
+    Carve a perfect maze into `walls` with recursive backtracking from (0, 0).
+
+    Parameters:
+      walls   : uint8 array (rows, cols) with every wall bit set; modified in place.
+      visited : bool array (rows, cols), all False; marked in place.
+      seed    : Seed for the neighbor choice.
+
+    Returns an int32 array of shape (2*rows*cols - 1, 2) recording every step of
+    the backtracker as (current_index, next_index), where indices are
+    row * cols + col and next_index is -1 when the step backtracks. Replaying it
+    reproduces the generation animation.
+    """
+    np.random.seed(seed)
+    n = rows * cols
+    order = np.empty((2 * n - 1, 2), dtype=np.int32)
+    stack = np.empty(n, dtype=np.int32)
+    stack[0] = 0
+    top = 1
+    visited[0, 0] = True
+    step = 0
+
+    while top > 0:
+        current = stack[top - 1]
+        row = current // cols
+        col = current % cols
+
+        # Encode the unvisited neighbors (top, right, bottom, left) as a 4-bit
+        # mask and pick one uniformly through the lookup tables.
+        mask = ((TOP if row > 0 and not visited[row - 1, col] else 0)
+                | (RIGHT if col < cols - 1 and not visited[row, col + 1] else 0)
+                | (BOTTOM if row < rows - 1 and not visited[row + 1, col] else 0)
+                | (LEFT if col > 0 and not visited[row, col - 1] else 0))
+        k = _POPCOUNT[mask]
+
+        order[step, 0] = current
+        if k > 0:
+            # Choose a random unvisited neighbor and remove the wall between them
+            direction = _NTH_BIT[mask, np.random.randint(0, k)]
+            nrow = row + _DROW[direction]
+            ncol = col + _DCOL[direction]
+            nxt = nrow * cols + ncol
+            walls[row, col] &= ALL_WALLS ^ (1 << direction)
+            walls[nrow, ncol] &= ALL_WALLS ^ (1 << ((direction + 2) & 3))
+            visited[nrow, ncol] = True
+            stack[top] = nxt
+            top += 1
+            order[step, 1] = nxt
+        else:
+            top -= 1
+            order[step, 1] = -1
+        step += 1
+
+    return order
@@ -1,5 +1,9 @@
+import functools
 import pygame
 import random
+import numpy as np
+from maze_core import TOP, RIGHT, BOTTOM, LEFT, ALL_WALLS, carve
+from utils import path_length_and_iter
 from queue import PriorityQueue
 from collections import deque
 
@@ -15,174 +19,290 @@ PURPLE  = (128, 0, 128)    # Currently processing cell
 
 DELAY   = 30             # Delay in milliseconds for animation speed
 
-# ----------------------------- #
-#       Maze Cell Class         #
-# ----------------------------- #
-class Cell:
-    def __init__(self, row, col):
-        self.row = row
-        self.col = col
-        # Each cell has four walls in order: [top, right, bottom, left]
-        self.walls = [True, True, True, True]
-        self.visited = False   # Used during maze generation
-
-    def draw(self, win, cell_size):
-        """Draw the cell walls on the window."""
-        x = self.col * cell_size
-        y = self.row * cell_size
-        
-        # Draw the top wall
-        if self.walls[0]:
-            pygame.draw.line(win, WHITE, (x, y), (x + cell_size, y), 2)
-        # Draw the right wall
-        if self.walls[1]:
-            pygame.draw.line(win, WHITE, (x + cell_size, y), (x + cell_size, y + cell_size), 2)
-        # Draw the bottom wall
-        if self.walls[2]:
-            pygame.draw.line(win, WHITE, (x + cell_size, y + cell_size), (x, y + cell_size), 2)
-        # Draw the left wall
-        if self.walls[3]:
-            pygame.draw.line(win, WHITE, (x, y + cell_size), (x, y), 2)
+# (row, col) offset from a cell to an adjacent cell -> (index of the wall
+# between them on the cell, index of the same wall on the adjacent cell)
+WALL_BETWEEN = {(-1, 0): (0, 2), (0, 1): (1, 3), (1, 0): (2, 0), (0, -1): (3, 1)}
+
+def wall_line(row, col, wall, cell_size):
+    """Return the (start, end) pixel coordinates of the given wall (0=top, 1=right, 2=bottom, 3=left)."""
+    x = col * cell_size
+    y = row * cell_size
+    if wall == 0:
+        return (x, y), (x + cell_size, y)
+    if wall == 1:
+        return (x + cell_size, y), (x + cell_size, y + cell_size)
+    if wall == 2:
+        return (x + cell_size, y + cell_size), (x, y + cell_size)
+    return (x, y + cell_size), (x, y)
+
+def draw_cell(win, walls, row, col, cell_size):
+    """Draw the walls of the cell at (row, col) given its packed wall byte."""
+    for wall in range(4):
+        if walls & (1 << wall):
+            pygame.draw.line(win, WHITE, *wall_line(row, col, wall, cell_size), 2)
+
+def _expand_walls(mask, cell_size):
+    """
+    Stretch a per-cell wall mask along axis 0 to pixel resolution. Each wall
+    spans cell_size + 1 pixels, matching the inclusive end point of draw.line.
+    """
+    span = np.zeros((mask.shape[0] * cell_size + 1,) + mask.shape[1:], dtype=np.bool_)
+    span[:-1] = np.repeat(mask, cell_size, axis=0)
+    span[cell_size::cell_size] |= mask
+    return span
 
 # ----------------------------- #
 #          Maze Class           #
 # ----------------------------- #
 class Maze:
-    def __init__(self, rows, cols, cell_size):
+    def __init__(self, rows, cols, cell_size, rng_seed=None):
         self.rows = rows
         self.cols = cols
         self.cell_size = cell_size
-        # Create a 2D grid of cells
-        self.grid = [[Cell(r, c) for c in range(cols)] for r in range(rows)]
-        self.stack = []  # Stack used for the recursive backtracking algorithm
-
-    def index(self, row, col):
-        """Return the cell at (row, col) if within bounds; otherwise return None."""
-        if row < 0 or col < 0 or row >= self.rows or col >= self.cols:
-            return None
-        return self.grid[row][col]
-
-    def get_unvisited_neighbors(self, cell):
-        """Return a list of unvisited neighbor cells (top, right, bottom, left)."""
-        neighbors = []
-        row, col = cell.row, cell.col
-        
-        # Check the four directions
-        top    = self.index(row - 1, col)
-        right  = self.index(row, col + 1)
-        bottom = self.index(row + 1, col)
-        left   = self.index(row, col - 1)
-        
-        if top and not top.visited:
-            neighbors.append(top)
-        if right and not right.visited:
-            neighbors.append(right)
-        if bottom and not bottom.visited:
-            neighbors.append(bottom)
-        if left and not left.visited:
-            neighbors.append(left)
-        return neighbors
-
-    def remove_walls(self, current, next_cell):
-        """Remove the walls between the current cell and the next cell."""
-        dx = current.col - next_cell.col
-        dy = current.row - next_cell.row
-        if dx == 1:  # next_cell is to the left of current
-            current.walls[3] = False
-            next_cell.walls[1] = False
-        elif dx == -1:  # next_cell is to the right of current
-            current.walls[1] = False
-            next_cell.walls[3] = False
-        if dy == 1:  # next_cell is above current
-            current.walls[0] = False
-            next_cell.walls[2] = False
-        elif dy == -1:  # next_cell is below current
-            current.walls[2] = False
-            next_cell.walls[0] = False
-
-    def generate_maze(self, win):
-        """Generate the maze using recursive backtracking."""
-        current = self.grid[0][0]
-        current.visited = True
-        self.stack.append(current)
-        
-        while self.stack:
-            current = self.stack[-1]
-            neighbors = self.get_unvisited_neighbors(current)
-            
-            if neighbors:
-                # Choose a random unvisited neighbor
-                next_cell = random.choice(neighbors)
-                next_cell.visited = True
-                # Remove the wall between current and next_cell
-                self.remove_walls(current, next_cell)
-                self.stack.append(next_cell)
-            else:
-                self.stack.pop()
-
-            # Optional: Animate the maze generation process
-            self.draw(win)
-            highlight_cell(win, (current.row, current.col), PURPLE, self.cell_size)
-            pygame.display.update()
-            pygame.time.delay(DELAY)
+        # Random source for generation; a fixed rng_seed reproduces the same maze
+        self._rng = random.Random(rng_seed)
+        # Packed wall bits per cell (see ALL_WALLS) and generation visited flags
+        self.walls = np.full((rows, cols), ALL_WALLS, dtype=np.uint8)
+        self.visited = np.zeros((rows, cols), dtype=np.bool_)
+        # Offscreen copy of the rendered maze; kept in sync by remove_walls so
+        # draw() is a single blit instead of a line call per wall.
+        self._render_bg()
+        self.precompute_adjacency()
+
+    def precompute_adjacency(self):
+        """
+        Build the neighbor tables used by the search and MDP algorithms.
+          - adj: int32 array (rows*cols, 4) holding, for the cell with index
+                 row*cols + col, the index of its accessible neighbor in each
+                 direction (top, right, bottom, left), or -1 if a wall blocks it.
+          - neighbors: list indexed the same way of the accessible neighbor
+                 coordinates as (row, col) tuples, in the same order.
+          - neighbor_indices: the same neighbors as lists of cell indices.
+        The maze is fixed after generation, so these are built once and shared
+        across every algorithm run on it.
+        """
+        rows, cols = self.rows, self.cols
+        walls = self.walls
+        idx = np.arange(rows * cols, dtype=np.int32).reshape(rows, cols)
+        adj = np.full((rows, cols, 4), -1, dtype=np.int32)
+        adj[1:, :, 0] = np.where(walls[1:] & TOP, -1, idx[:-1])
+        adj[:, :-1, 1] = np.where(walls[:, :-1] & RIGHT, -1, idx[:, 1:])
+        adj[:-1, :, 2] = np.where(walls[:-1] & BOTTOM, -1, idx[1:])
+        adj[:, 1:, 3] = np.where(walls[:, 1:] & LEFT, -1, idx[:, :-1])
+        self.adj = adj.reshape(rows * cols, 4)
+        self.neighbor_indices = [[i for i in cell if i >= 0] for cell in self.adj.tolist()]
+        self.neighbors = [tuple(divmod(i, cols) for i in cell) for cell in self.neighbor_indices]
+
+    def snapshot(self):
+        """Return copies of the wall and visited arrays so a run can be undone with restore()."""
+        return self.walls.copy(), self.visited.copy()
+
+    def restore(self, snap):
+        """Restore the wall and visited arrays from a snapshot() taken earlier."""
+        walls, visited = snap
+        np.copyto(self.walls, walls)
+        np.copyto(self.visited, visited)
+
+    def _render_bg(self):
+        """Render every cell wall onto the cached background surface."""
+        # A private copy, since remove_walls edits the background in place
+        self._bg = render_background(self.walls.tobytes(), self.rows, self.cols, self.cell_size).copy()
+
+    def remove_walls(self, r1, c1, r2, c2):
+        """Remove the walls between the cell (r1, c1) and the adjacent cell (r2, c2)."""
+        wall, opposite = WALL_BETWEEN[(r2 - r1, c2 - c1)]
+        self.walls[r1, c1] &= ALL_WALLS ^ (1 << wall)
+        self.walls[r2, c2] &= ALL_WALLS ^ (1 << opposite)
+
+        # Erase the shared wall on the cached background, then repaint the
+        # walls of the surrounding cells in case the erase clipped a corner.
+        pygame.draw.line(self._bg, BLACK, *wall_line(r1, c1, wall, self.cell_size), 2)
+        for r in range(max(min(r1, r2) - 1, 0), min(max(r1, r2) + 2, self.rows)):
+            for c in range(max(min(c1, c2) - 1, 0), min(max(c1, c2) + 2, self.cols)):
+                draw_cell(self._bg, self.walls[r, c], r, c, self.cell_size)
+
+    def generate_maze(self, win, animate=True, frame_skip=None):
+        """
+        Generate the maze using recursive backtracking.
+        The walls are carved by the compiled maze_core.carve kernel on a scratch
+        array; its step order is then replayed here to animate the process.
+
+        Parameters:
+          win        : Pygame window (may be None when not animating).
+          animate    : If False, skip the animation and install the walls directly.
+          frame_skip : Number of generation steps per display update; defaults
+                       to max(1, rows*cols // 200). Only the changed rectangles
+                       are pushed to the display on each update.
+        """
+        walls = np.full_like(self.walls, ALL_WALLS)
+        order = carve(walls, self.visited, self.rows, self.cols, self._rng.randrange(2**31))
+
+        if animate and win is not None:
+            self._animate_generation(win, order, frame_skip or max(1, self.rows * self.cols // 200))
+        else:
+            np.copyto(self.walls, walls)
+            self._render_bg()
         
         # Reset visited flags so they can be used in the search visualizations
-        for row in self.grid:
-            for cell in row:
-                cell.visited = False
+        self.visited[:] = False
+        self.precompute_adjacency()
+
+    def _animate_generation(self, win, order, frame_skip):
+        """Replay the carve order from generate_maze, updating only dirty rectangles."""
+        cs = self.cell_size
+        self.draw(win)
+        pygame.display.update()
+        dirty = []
+        highlight = None
+        for step, (current, next_cell) in enumerate(order, 1):
+            r1, c1 = divmod(int(current), self.cols)
+            if highlight is not None:
+                # Clear the previous highlight back to the background
+                win.blit(self._bg, highlight, highlight)
+                dirty.append(highlight)
+            if next_cell >= 0:
+                r2, c2 = divmod(int(next_cell), self.cols)
+                self.remove_walls(r1, c1, r2, c2)
+                changed = pygame.Rect(min(c1, c2) * cs, min(r1, r2) * cs,
+                                      (abs(c1 - c2) + 1) * cs + 2, (abs(r1 - r2) + 1) * cs + 2)
+                win.blit(self._bg, changed, changed)
+                dirty.append(changed)
+            highlight = pygame.Rect(c1 * cs + 4, r1 * cs + 4, cs - 8, cs - 8)
+            highlight_cell(win, (r1, c1), PURPLE, cs)
+            dirty.append(highlight)
+            if step % frame_skip == 0 or step == len(order):
+                pygame.display.update(dirty)
+                dirty.clear()
+                pygame.time.delay(DELAY)
 
     def draw(self, win):
         """Draw the complete maze (all cells and their walls)."""
-        win.fill(BLACK)
-        for row in self.grid:
-            for cell in row:
-                cell.draw(win, self.cell_size)
+        win.blit(self._bg, (0, 0))
 
 # ----------------------------- #
 #       Helper Functions        #
 # ----------------------------- #
+@functools.lru_cache(maxsize=4)
+def render_background(walls_bytes, rows, cols, cell_size):
+    """
+    Render a maze background surface from the raw bytes of a walls array.
+    The wall pixels are computed with array masks and written in a single
+    blit_array call; each wall covers the same 2px band as draw_cell.
+    Results are cached per wall layout, so every maze of the same size
+    shares the all-walls render and repeated renders of one maze are free.
+    Callers must not modify the returned surface.
+    """
+    cs = cell_size
+    width, height = cols * cs, rows * cs
+    # Padded so the right/bottom walls on the far edges can overhang.
+    lit = np.zeros((width + 2, height + 2), dtype=np.bool_)
+    walls = np.frombuffer(walls_bytes, dtype=np.uint8).reshape(rows, cols).T  # surfarray indexes pixels as [x, y]
+    for bit, offset in ((TOP, 0), (BOTTOM, cs)):
+        span = _expand_walls((walls & bit) != 0, cs)
+        for t in range(2):
+            lit[:width + 1, offset + t:offset + t + height:cs] |= span
+    for bit, offset in ((LEFT, 0), (RIGHT, cs)):
+        span = _expand_walls(((walls & bit) != 0).T, cs).T
+        for t in range(2):
+            lit[offset + t:offset + t + width:cs, :height + 1] |= span
+    pixels = np.zeros((width, height, 3), dtype=np.uint8)
+    pixels[lit[:width, :height]] = WHITE
+    surface = pygame.Surface((width, height))
+    pygame.surfarray.blit_array(surface, pixels)
+    return surface
+
+@functools.lru_cache(maxsize=None)
+def _highlight_surface(color, cell_size):
+    """Return a cached surface pre-filled with the highlight color for the given cell size."""
+    surface = pygame.Surface((cell_size - 8, cell_size - 8))
+    surface.fill(color)
+    return surface
+
 def highlight_cell(win, cell_coord, color, cell_size):
     """
     Highlight a cell at the given coordinate with a colored rectangle.
     A small margin is added so the underlying walls are still visible.
+    Returns the changed rectangle, for use with pygame.display.update.
     """
     row, col = cell_coord
-    x = col * cell_size
-    y = row * cell_size
-    pygame.draw.rect(win, color, (x + 4, y + 4, cell_size - 8, cell_size - 8))
+    return win.blit(_highlight_surface(color, cell_size), (col * cell_size + 4, row * cell_size + 4))
+
+def animate_search(win, maze, steps, path):
+    """
+    Replay a search trace on the window, then show the solution path.
+
+    Parameters:
+      steps : iterable of (cell index, cell indices added to the frontier) pairs,
+              in expansion order, as returned by the search_* functions.
+      path  : solution path as an iterable of (row, col) cells.
+
+    The maze is drawn once; each step then repaints only the cells it changes
+    (the previous cell turns blue as visited, the cells added to the frontier on
+    the previous step orange, the current cell purple) and pushes those
+    rectangles to the display.
+    """
+    # Bind what the per-step loop uses to locals once, instead of resolving
+    # maze attributes, module globals and pygame submodules on every step.
+    cols = maze.cols
+    cell_size = maze.cell_size
+    highlight = highlight_cell
+    update = pygame.display.update
+    delay = pygame.time.delay
+    maze.draw(win)
+    update()
+    previous = None
+    pushed = []
+    for current, next_pushed in steps:
+        dirty = [highlight(win, divmod(cell, cols), ORANGE, cell_size) for cell in pushed]
+        if previous is not None:
+            dirty.append(highlight(win, divmod(previous, cols), BLUE, cell_size))
+        dirty.append(highlight(win, divmod(current, cols), PURPLE, cell_size))
+        update(dirty)
+        delay(DELAY)
+        previous = current
+        pushed = next_pushed
+
+    maze.draw(win)
+    path_length = 0
+    for cell in path:
+        highlight(win, cell, GREEN, cell_size)
+        path_length += 1
+    update()
+    delay(DELAY * path_length)
+
+def animate_path(win, maze, path):
+    """
+    Walk a highlight along the given path of (row, col) cells, one cell per frame.
+    The maze is drawn once; each later frame only restores the previous cell from
+    the maze background, highlights the next one and updates those two rectangles.
+    """
+    maze.draw(win)
+    previous = None
+    for state in path:
+        if previous is not None:
+            win.blit(maze._bg, previous, previous)
+        rect = highlight_cell(win, state, GREEN, maze.cell_size)
+        if previous is None:
+            pygame.display.update()
+        else:
+            pygame.display.update([previous, rect])
+        pygame.time.delay(DELAY)
+        previous = rect
 
 def get_neighbors_coord(cell_coord, maze):
     """
-    Given a cell coordinate (row, col), return a list of neighboring cell coordinates
+    Given a cell coordinate (row, col), return the neighboring cell coordinates
     that are accessible (i.e. where the wall between them has been removed).
+    Reads the table built by Maze.precompute_adjacency.
     """
     row, col = cell_coord
-    neighbors = []
-    cell = maze.grid[row][col]
-    
-    # Check top neighbor
-    if not cell.walls[0] and row > 0:
-        neighbors.append((row - 1, col))
-    # Check right neighbor
-    if not cell.walls[1] and col < maze.cols - 1:
-        neighbors.append((row, col + 1))
-    # Check bottom neighbor
-    if not cell.walls[2] and row < maze.rows - 1:
-        neighbors.append((row + 1, col))
-    # Check left neighbor
-    if not cell.walls[3] and col > 0:
-        neighbors.append((row, col - 1))
-    return neighbors
-
-def reconstruct_path(came_from, start, end):
+    return maze.neighbors[row * maze.cols + col]
+
+def reconstruct_path(came_from, start, end, cols):
     """
-    Reconstruct the path from start to end using the dictionary that maps each cell
-    to the cell it came from.
+    Reconstruct the path from start to end as a list of (row, col) coordinates,
+    given the flat array that maps each cell index (row*cols + col) to the index
+    of the cell it came from (-1 where there is none).
+    See utils.path_length_and_iter to get the length without building the list.
     """
-    path = []
-    current = end
-    while current is not None:
-        path.append(current)
-        current = came_from.get(current)
-    path.reverse()
-    return path
\ No newline at end of file
+    return list(path_length_and_iter(came_from, start, end, cols)[1])
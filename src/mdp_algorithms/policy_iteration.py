@@ -1,99 +1,199 @@
-import math
-import pygame
-from maze_generator import highlight_cell, DELAY, GREEN
-from utils import get_possible_actions, extract_policy_path
+import numpy as np
+from maze_core import njit
+from maze_generator import animate_path
+from utils import extract_policy_path, morton_order, policy_to_dict, solve_shortest_path_mdp, transition_table
 
-def policy_iteration(maze, win, gamma=0.9, theta=1e-4):
+@njit(cache=True, fastmath=True)
+def _pe_sweep(V, policy, nbr, order, gamma):
     """
-    Solve the maze using Policy Iteration.
-    
-    Parameters:
-      maze   : Maze object.
-      gamma  : Discount factor.
-      theta  : Convergence threshold for policy evaluation.
-      win    : Pygame window
-      
-    Returns:
-      A tuple (steps_taken, policy_improvement_count, total_evaluation_iterations) where:
-        - steps_taken: number of cells in the final optimal path.
-        - policy_improvement_count: number of times the policy was improved.
-        - total_evaluation_iterations: total sweeps performed during all policy evaluations.
-    
-    Reward for each move is -1; terminal state is (maze.rows-1, maze.cols-1).
+    One in-place evaluation sweep of a fixed policy over the states in `order`:
+    V[i] = -1 + gamma * V[next] where next = nbr[i, policy[i]]; states without
+    an action keep their value. Returns the largest change made to V.
+    """
+    delta = 0.0
+    for i in order:
+        a = policy[i]
+        if a < 0:
+            continue
+        j = nbr[i, a]
+        if j < 0:
+            continue
+        v = -1.0 + gamma * V[j]
+        diff = abs(v - V[i])
+        if diff > delta:
+            delta = diff
+        V[i] = v
+    return delta
+
+@njit(cache=True)
+def _improve_policy(V, policy, nbr, gamma):
+    """
+    Make the policy greedy with respect to V in place, taking the first best
+    action in U, R, D, L order. A state keeps its current action unless the
+    best action is strictly better, so actions tied in value never swap back
+    and forth. Returns True if no action changed.
+    """
+    stable = True
+    for i in range(V.shape[0]):
+        best_action = -1
+        best_value = 0.0
+        for k in range(4):
+            j = nbr[i, k]
+            if j >= 0:
+                q = -1.0 + gamma * V[j]
+                if best_action < 0 or q > best_value:
+                    best_value = q
+                    best_action = k
+        if best_action < 0 or best_action == policy[i]:
+            continue
+        current = policy[i]
+        if current >= 0 and nbr[i, current] >= 0 and best_value <= -1.0 + gamma * V[nbr[i, current]]:
+            continue
+        policy[i] = best_action
+        stable = False
+    return stable
+
+@njit(cache=True)
+def _solve_policy_values(V, policy, nbr, gamma):
+    """
+    Evaluate a fixed policy exactly, overwriting V. Every state has a single
+    successor under the policy, so V[i] = -1 + gamma * V[next] is solved by
+    following each state's chain of successors to a state whose value is
+    already known and filling the chain in backwards: O(N) in total, with no
+    linear algebra. States without an action have value 0, and states on a
+    cycle of the policy collect -1 forever, which is worth -1 / (1 - gamma).
+    """
+    N = V.shape[0]
+    status = np.zeros(N, dtype=np.uint8)  # 0 not yet valued, 1 on the current chain, 2 valued
+    chain = np.empty(N, dtype=np.int64)
+    cycle_value = -1.0 / (1.0 - gamma)
+    for s in range(N):
+        n = 0
+        i = s
+        while status[i] == 0:
+            a = policy[i]
+            j = nbr[i, a] if a >= 0 else -1
+            if j < 0:
+                V[i] = 0.0
+                status[i] = 2
+                break
+            status[i] = 1
+            chain[n] = i
+            n += 1
+            i = j
+        if status[i] == 1:
+            # The chain ran into itself: the states from i on form a cycle.
+            while True:
+                n -= 1
+                k = chain[n]
+                V[k] = cycle_value
+                status[k] = 2
+                if k == i:
+                    break
+        while n > 0:
+            n -= 1
+            k = chain[n]
+            V[k] = -1.0 + gamma * V[nbr[k, policy[k]]]
+            status[k] = 2
+
+def _improve_to_convergence(maze, gamma, theta, direct=False):
+    """
+    Alternate policy evaluation and improvement until the policy is stable.
+    With direct=True each evaluation is one exact solve instead of sweeps.
+    Improvement also stops if it returns to a policy it has already produced,
+    so inexact values cannot make the iteration cycle forever.
+    Returns (policy, policy_improvement_count, total_evaluation_iterations).
     """
-    states = []
-    for r in range(maze.rows):
-        for c in range(maze.cols):
-            states.append((r, c))
-    # Initialize arbitrary policy and value function.
-    policy = {}
-    V = {}
-    for state in states:
-        V[state] = 0.0
-        if state == (maze.rows - 1, maze.cols - 1):
-            policy[state] = None
-        else:
-            actions = get_possible_actions(maze, state)
-            policy[state] = actions[0][0] if actions else None
-    terminal = (maze.rows - 1, maze.cols - 1)
+    N = maze.rows * maze.cols
+    nbr, terminal = transition_table(maze)
+    # Initialize arbitrary policy (first available action) and value function.
+    available = nbr >= 0
+    policy = np.where(available.any(axis=1), available.argmax(axis=1), -1).astype(np.int8)
+    V = np.zeros(N)
+    # Evaluation sweeps visit states in Morton order, so a state and its
+    # vertical neighbors are usually in nearby cache lines.
+    order = morton_order(maze.rows, maze.cols)
     
     total_evaluation_iterations = 0
     policy_improvement_count = 0
 
     def policy_evaluation(policy, V):
+        if direct:
+            _solve_policy_values(V, policy, nbr, gamma)
+            return 1
         eval_iterations = 0
         while True:
             eval_iterations += 1
-            delta = 0
-            for state in states:
-                if state == terminal:
-                    continue
-                a = policy[state]
-                actions = get_possible_actions(maze, state)
-                next_state = None
-                for (act, ns) in actions:
-                    if act == a:
-                        next_state = ns
-                        break
-                if next_state is None:
-                    continue
-                v = V[state]
-                V[state] = -1 + gamma * V[next_state]
-                delta = max(delta, abs(v - V[state]))
-            if delta < theta:
+            delta = _pe_sweep(V, policy, nbr, order, gamma)
+            # A sweep that changes nothing has reached the exact fixed point,
+            # which also ends the evaluation when theta is 0.
+            if delta < theta or delta == 0.0:
                 break
         return eval_iterations
 
+    seen = {policy.tobytes()}
     stable = False
     while not stable:
         eval_iters = policy_evaluation(policy, V)
         total_evaluation_iterations += eval_iters
         policy_improvement_count += 1
-        stable = True
-        for state in states:
-            if state == terminal:
-                continue
-            actions = get_possible_actions(maze, state)
-            if not actions:
-                continue
-            old_action = policy[state]
-            best_action = None
-            best_value = -math.inf
-            for (a, next_state) in actions:
-                q = -1 + gamma * V[next_state]
-                if q > best_value:
-                    best_value = q
-                    best_action = a
-            if best_action != old_action:
-                policy[state] = best_action
-                stable = False
+        stable = _improve_policy(V, policy, nbr, gamma)
+        key = policy.tobytes()
+        if key in seen:
+            break
+        seen.add(key)
+    return policy, policy_improvement_count, total_evaluation_iterations
+
+def compute_policy_iteration(maze, gamma=0.9, theta=1e-4, exact=False, direct=False):
+    """
+    Solve the maze using Policy Iteration, without drawing anything.
+    
+    Parameters:
+      maze   : Maze object.
+      gamma  : Discount factor.
+      theta  : Convergence threshold for policy evaluation; 0 evaluates each
+               policy until a sweep leaves V unchanged.
+      exact  : If True, skip evaluation and improvement and take the optimal
+               policy from the closed-form BFS solution
+               (utils.solve_shortest_path_mdp); both counts are then 0.
+      direct : If True, evaluate each policy exactly by following each
+               state's chain of policy moves (see _solve_policy_values)
+               instead of sweeping until theta; each evaluation then counts
+               as one iteration.
+      
+    Returns:
+      A tuple (path, policy_improvement_count, total_evaluation_iterations) where:
+        - path: the optimal path as a list of (row, col) cells, or None if
+          the resulting policy does not lead from (0, 0) to the terminal.
+        - policy_improvement_count: number of times the policy was improved.
+        - total_evaluation_iterations: total sweeps performed during all policy evaluations.
+    
+    Reward for each move is -1; terminal state is (maze.rows-1, maze.cols-1).
+    """
+    if exact:
+        V, policy = solve_shortest_path_mdp(maze, gamma)
+        policy_improvement_count = total_evaluation_iterations = 0
+    else:
+        policy, policy_improvement_count, total_evaluation_iterations = _improve_to_convergence(maze, gamma, theta, direct)
 
-    # Animate the optimal path.
-    path = extract_policy_path(policy, maze)
+    path = extract_policy_path(policy_to_dict(policy, maze), maze)
+    return path, policy_improvement_count, total_evaluation_iterations
+
+def policy_iteration(maze, win, gamma=0.9, theta=1e-4, exact=False, direct=False):
+    """
+    Solve the maze using Policy Iteration (see compute_policy_iteration) and
+    animate the optimal path if a window is provided.
+      
+    Returns:
+      A tuple (steps_taken, policy_improvement_count, total_evaluation_iterations) where:
+        - steps_taken: number of cells in the final optimal path (None if
+          there is no path).
+        - policy_improvement_count: number of times the policy was improved.
+        - total_evaluation_iterations: total sweeps performed during all policy evaluations.
+    """
+    path, policy_improvement_count, total_evaluation_iterations = compute_policy_iteration(maze, gamma, theta, exact, direct)
+    if path is None:
+        return None, policy_improvement_count, total_evaluation_iterations
     if win is not None:
-        for state in path:
-            maze.draw(win)
-            highlight_cell(win, state, GREEN, maze.cell_size)
-            pygame.display.update()
-            pygame.time.delay(DELAY)
+        animate_path(win, maze, path)
     return len(path), policy_improvement_count, total_evaluation_iterations
@@ -1,80 +1,303 @@
-import math
-import pygame
-from maze_generator import highlight_cell, DELAY, GREEN
-from utils import get_possible_actions, extract_policy_path
+import heapq
+import numpy as np
+from maze_core import njit, prange
+from maze_generator import animate_path
+from utils import bfs_order, extract_policy_path, policy_to_dict, solve_shortest_path_mdp, transition_table
 
-def value_iteration(maze, win, gamma=0.9, theta=1e-4):
+@njit(cache=True, fastmath=True)
+def _vi_sweep(V, nbr, order, gamma):
     """
-    Solve the maze using Value Iteration.
+    One in-place (Gauss-Seidel) Bellman sweep over the states in `order`:
+    V[i] = max_k -1 + gamma * V[nbr[i, k]] over the available actions, reading
+    values already updated earlier in the sweep; states without actions keep
+    their value. Returns the largest change made to V.
+    """
+    delta = 0.0
+    for i in order:
+        # No infinities here: fastmath assumes finite values.
+        best = V[i]
+        found = False
+        for k in range(4):
+            j = nbr[i, k]
+            if j >= 0:
+                q = -1.0 + gamma * V[j]
+                if not found or q > best:
+                    best = q
+                    found = True
+        diff = abs(best - V[i])
+        if diff > delta:
+            delta = diff
+        V[i] = best
+    return delta
+
+@njit(cache=True, parallel=True, fastmath=True)
+def _vi_sweep_parallel(V_old, V_new, nbr, gamma):
+    """
+    One Jacobi Bellman sweep split across threads: V_new[i] = max_k -1 + gamma *
+    V_old[nbr[i, k]] over the available actions, reading only V_old so states
+    can be updated in any order; states without actions keep their value.
+    Returns the largest change between V_old and V_new.
+    """
+    delta = 0.0
+    for i in prange(V_old.shape[0]):
+        best = V_old[i]
+        found = False
+        for k in range(4):
+            j = nbr[i, k]
+            if j >= 0:
+                q = -1.0 + gamma * V_old[j]
+                if not found or q > best:
+                    best = q
+                    found = True
+        V_new[i] = best
+        delta = max(delta, abs(best - V_old[i]))
+    return delta
+
+@njit(cache=True)
+def _greedy_policy(V, nbr, gamma):
+    """Return the greedy action code for every state (-1 where no action applies)."""
+    policy = np.full(V.shape[0], -1, dtype=np.int8)
+    for i in range(V.shape[0]):
+        best = -np.inf
+        for k in range(4):
+            j = nbr[i, k]
+            if j >= 0:
+                q = -1.0 + gamma * V[j]
+                if q > best:
+                    best = q
+                    policy[i] = k
+    return policy
+
+@njit(cache=True)
+def _distance_sweep(D, nbr, order, unreached):
+    """
+    One in-place sweep of the step-distance form of the Bellman update over the
+    states in `order`: D[i] = 1 + min_k D[nbr[i, k]] over the available actions,
+    capped at `unreached`; states without actions keep their distance.
+    Returns True if any distance changed.
+    """
+    changed = False
+    for i in order:
+        best = unreached
+        found = False
+        for k in range(4):
+            j = nbr[i, k]
+            if j >= 0:
+                found = True
+                if D[j] + 1 < best:
+                    best = D[j] + 1
+        if found and best != D[i]:
+            D[i] = best
+            changed = True
+    return changed
+
+@njit(cache=True)
+def _nearest_policy(D, nbr):
+    """Return the action code towards the neighbor with the smallest distance (-1 where no action applies)."""
+    policy = np.full(D.shape[0], -1, dtype=np.int8)
+    for i in range(D.shape[0]):
+        best = -1
+        for k in range(4):
+            j = nbr[i, k]
+            if j >= 0 and (best < 0 or D[j] < best):
+                best = D[j]
+                policy[i] = k
+    return policy
+
+def _distances_to_fixed_point(maze, gamma):
+    """
+    Run value iteration on int32 step distances to the terminal instead of
+    float values, until a sweep changes nothing; returns (V, policy, iter_count).
+    With a reward of -1 per move, V = -(1 - gamma**D) / (1 - gamma) is a
+    monotone function of D, so both iterations pick the same actions, but the
+    integer fixed point is reached and detected exactly with no theta.
+    """
+    N = maze.rows * maze.cols
+    nbr, terminal = transition_table(maze)
+    order = bfs_order(maze, terminal)
+
+    # Every reachable distance is below N, so N stands for "not reached (yet)".
+    unreached = N
+    D = np.full(N, unreached, dtype=np.int32)
+    D[terminal] = 0
+
+    iter_count = 0
+    while True:
+        iter_count += 1
+        if not _distance_sweep(D, nbr, order, unreached):
+            break
+
+    policy = _nearest_policy(D, nbr)
+    # States that never reach the terminal take the limit d -> infinity.
+    V = np.where(D < unreached, -(1.0 - np.power(gamma, D)) / (1.0 - gamma), -1.0 / (1.0 - gamma))
+    return V, policy, iter_count
+
+def _parallel_sweeps_to_convergence(maze, gamma):
+    """
+    Run double-buffered (Jacobi) value iteration sweeps, each split across
+    threads, until a sweep changes nothing; returns (V, policy, iter_count).
+    V starts from the lower bound -1 / (1 - gamma), 0 at the terminal. A state
+    whose successors are all still at the bound stays there, so each sweep
+    gives the next ring of states around the terminal its final value and
+    leaves the rest unchanged; the sweep after the farthest ring changes
+    nothing. Sweeps from V = 0 would instead raise all far states together,
+    and theta would stop them while those are still tied, so theta is not
+    used here.
+    """
+    N = maze.rows * maze.cols
+    nbr, terminal = transition_table(maze)
+
+    V = np.full(N, -1.0 / (1.0 - gamma))
+    V[terminal] = 0.0
+    V_new = V.copy()
+
+    iter_count = 0
+    while True:
+        iter_count += 1
+        delta = _vi_sweep_parallel(V, V_new, nbr, gamma)
+        V, V_new = V_new, V
+        if delta == 0.0:
+            break
+
+    policy = _greedy_policy(V, nbr, gamma)
+    return V, policy, iter_count
+
+def _prioritized_sweeping(maze, gamma):
+    """
+    Run value iteration as single-state Bellman backups taken from a worklist
+    instead of full sweeps; returns (V, policy, backup_count).
+    With a reward of -1 per move, a state's value only depends on successors
+    of higher value, so the worklist is ordered like Dijkstra's algorithm:
+    the state with the highest tentative value is backed up next, and its
+    value is then final. Each backup offers the new value to the states that
+    can move into it, which queue again whenever it improves theirs, so every
+    state is backed up exactly once (O(N log N) for the heap).
+    """
+    N = maze.rows * maze.cols
+    nbr, terminal = transition_table(maze)
+    # predecessors[i] lists (j, k): taking action k from state j leads to i.
+    predecessors = [[] for _ in range(N)]
+    for j, row in enumerate(nbr.tolist()):
+        for k, i in enumerate(row):
+            if i >= 0:
+                predecessors[i].append((j, k))
+
+    # Start from the lower bound on every value, so any offered value is kept.
+    V = [-1.0 / (1.0 - gamma)] * N
+    V[terminal] = 0.0
+    policy = np.full(N, -1, dtype=np.int8)
+    done = [False] * N
+
+    # Max-heap of (-value, push count, state); the push count breaks ties in
+    # first-queued order, so states that float64 cannot tell apart still come
+    # out nearest the terminal first. Stale entries are skipped when popped.
+    heap = [(-0.0, 0, terminal)]
+    pushes = 1
+    backup_count = 0
+    while heap:
+        _, _, i = heapq.heappop(heap)
+        if done[i]:
+            continue
+        done[i] = True
+        backup_count += 1
+        q = -1.0 + gamma * V[i]
+        for j, k in predecessors[i]:
+            if not done[j] and (policy[j] < 0 or q > V[j]):
+                V[j] = q
+                policy[j] = k
+                heapq.heappush(heap, (-q, pushes, j))
+                pushes += 1
+
+    return np.array(V), policy, backup_count
+
+def _sweep_to_convergence(maze, gamma, theta):
+    """Run value iteration sweeps to convergence; returns (V, policy, iter_count)."""
+    N = maze.rows * maze.cols
+    nbr, terminal = transition_table(maze)
+
+    # Sweep states nearest the terminal first, so each update already sees the
+    # new value of its successor on the shortest path.
+    order = bfs_order(maze, terminal)
+
+    # Initialize V(s)=0 for all states.
+    V = np.zeros(N)
+    
+    iter_count = 0
+    while True:
+        iter_count += 1
+        delta = _vi_sweep(V, nbr, order, gamma)
+        if delta < theta:
+            break
+    
+    # Derive optimal policy (action codes, -1 where no action applies).
+    policy = _greedy_policy(V, nbr, gamma)
+    return V, policy, iter_count
+
+def compute_value_iteration(maze, gamma=0.9, theta=1e-4, exact=False, integer=False, parallel=False,
+                            prioritized=False):
+    """
+    Solve the maze using Value Iteration, without drawing anything.
     
     Parameters:
-      maze   : Maze object (with attributes rows, cols, and grid where each cell has .walls)
+      maze   : Maze object (with attributes rows, cols, and the adj neighbor table)
       gamma  : Discount factor.
       theta  : Convergence threshold.
-      win    : Pygame window
+      exact  : If True, skip the sweeps and take the optimal policy from the
+               closed-form BFS solution (utils.solve_shortest_path_mdp);
+               iter_count is then 0.
+      integer: If True, iterate on int32 step distances to the terminal until
+               they stop changing, instead of float values until theta; V is
+               derived from the distances at the end.
+      parallel: If True, run double-buffered (Jacobi) sweeps with the states
+               of each sweep split across threads, instead of in-place
+               sweeps, from the lower bound -1 / (1 - gamma) until a sweep
+               changes nothing (theta is not used).
+      prioritized: If True, replace full sweeps with prioritized sweeping:
+               single-state backups driven by a worklist that takes the
+               states in decreasing order of value, from the terminal out;
+               iter_count then counts those single-state backups (one per
+               state that reaches the terminal).
     
     Returns:
-      A tuple (steps_taken, iter_count, 0) where:
-        - steps_taken: number of cells in the final optimal path.
+      A tuple (path, iter_count, 0) where:
+        - path: the optimal path as a list of (row, col) cells, or None if
+          the resulting policy does not lead from (0, 0) to the terminal.
         - iter_count: number of full state sweeps (iterations) until convergence.
         - The third metric is 0 (not used for value iteration).
     
     Reward for each move is -1; terminal state is (maze.rows-1, maze.cols-1).
     """
-    # Initialize V(s)=0 for all states.
-    V = {}
-    states = []
-    for r in range(maze.rows):
-        for c in range(maze.cols):
-            state = (r, c)
-            V[state] = 0.0
-            states.append(state)
-    terminal = (maze.rows - 1, maze.cols - 1)
-    
-    iter_count = 0
-    while True:
-        iter_count += 1
-        delta = 0
-        for state in states:
-            if state == terminal:
-                continue
-            actions = get_possible_actions(maze, state)
-            if not actions:
-                continue
-            v = V[state]
-            Q_values = []
-            for (a, next_state) in actions:
-                Q_values.append(-1 + gamma * V[next_state])
-            V[state] = max(Q_values)
-            delta = max(delta, abs(v - V[state]))
-        if delta < theta:
-            break
+    if exact:
+        V, policy = solve_shortest_path_mdp(maze, gamma)
+        iter_count = 0
+    elif integer:
+        V, policy, iter_count = _distances_to_fixed_point(maze, gamma)
+    elif parallel:
+        V, policy, iter_count = _parallel_sweeps_to_convergence(maze, gamma)
+    elif prioritized:
+        V, policy, iter_count = _prioritized_sweeping(maze, gamma)
+    else:
+        V, policy, iter_count = _sweep_to_convergence(maze, gamma, theta)
+
+    path = extract_policy_path(policy_to_dict(policy, maze), maze)
+    return path, iter_count, 0
+
+def value_iteration(maze, win, gamma=0.9, theta=1e-4, exact=False, integer=False, parallel=False,
+                    prioritized=False):
+    """
+    Solve the maze using Value Iteration (see compute_value_iteration) and
+    animate the optimal path if a window is provided.
     
-    # Derive optimal policy.
-    policy = {}
-    for state in states:
-        if state == terminal:
-            policy[state] = None
-            continue
-        actions = get_possible_actions(maze, state)
-        if not actions:
-            policy[state] = None
-            continue
-        best_action = None
-        best_value = -math.inf
-        for (a, next_state) in actions:
-            q = -1 + gamma * V[next_state]
-            if q > best_value:
-                best_value = q
-                best_action = a
-        policy[state] = best_action
-
-    # Animate the optimal path if a window is provided.
-    path = extract_policy_path(policy, maze)
+    Returns:
+      A tuple (steps_taken, iter_count, 0) where:
+        - steps_taken: number of cells in the final optimal path (None if
+          there is no path).
+        - iter_count: number of full state sweeps (iterations) until convergence.
+        - The third metric is 0 (not used for value iteration).
+    """
+    path, iter_count, _ = compute_value_iteration(maze, gamma, theta, exact, integer, parallel, prioritized)
+    if path is None:
+        return None, iter_count, 0
     if win is not None:
-        for state in path:
-            maze.draw(win)
-            highlight_cell(win, state, GREEN, maze.cell_size)
-            pygame.display.update()
-            pygame.time.delay(DELAY)
+        animate_path(win, maze, path)
     return len(path), iter_count, 0
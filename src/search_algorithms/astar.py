@@ -1,6 +1,8 @@
-import pygame
-from queue import PriorityQueue
-from maze_generator import BLUE, ORANGE, PURPLE, GREEN, DELAY, highlight_cell, get_neighbors_coord, reconstruct_path
+import heapq
+import itertools
+from array import array
+from maze_generator import animate_search
+from utils import expansion_steps, path_length_and_iter
 
 def heuristic(a, b):
     """Manhattan distance heuristic for A* search."""
@@ -8,76 +10,87 @@ def heuristic(a, b):
     (x2, y2) = b
     return abs(x1 - x2) + abs(y1 - y2)
 
-def solve_astar(maze, win):
+def search_astar(maze):
     """
-    Solve the maze using the A* search algorithm and animate the process.
-    Uses the Manhattan distance as the heuristic.
-    
-    Parameters:
-        maze : Maze object.
-        win  : Pygame window
+    Search the maze with A* (Manhattan distance heuristic) from the top-left
+    to the bottom-right cell, without drawing anything.
 
-    Returns a tuple: (steps_taken, nodes_expanded, max_frontier_size), where:
-        - steps_taken: number of cells in the final optimal path.
+    Returns a tuple (steps_taken, path, steps, nodes_expanded, max_frontier_size), where:
+        - steps_taken: number of cells in the final path.
+        - path: iterator over the path's (row, col) cells (see utils.path_length_and_iter).
+        - steps: the expansion order for animate_search, as an iterator of
+          (cell index, list of cell indices added to the frontier) pairs.
         - nodes_expanded: number of nodes expanded during the search.
         - max_frontier_size: maximum number of nodes in the frontier at any point during the search.
     """
-    start = (0, 0)
-    end = (maze.rows - 1, maze.cols - 1)
-    open_set = PriorityQueue()
-    open_set.put((0, start))
-    came_from = {}
+    # Cells are tracked by flat index row*cols + col, with g scores and
+    # predecessors in flat arrays instead of tuple-keyed dicts.
+    cols = maze.cols
+    N = maze.rows * cols
+    start = 0
+    end = N - 1
+    end_coord = divmod(end, cols)
+    # Binary heap of (f, push order, g, cell); the push order breaks f ties
+    # first-in first-out without comparing cells. A cell whose g improves is
+    # pushed again and its older entry skipped when popped (lazy deletion).
+    counter = itertools.count()
+    open_set = [(heuristic(divmod(start, cols), end_coord), next(counter), 0, start)]
+    came_from = array("i", [-1]) * N
     
-    # Initialize g_score and f_score dictionaries
-    g_score = { (r, c): float('inf') for r in range(maze.rows) for c in range(maze.cols) }
+    # Initialize g_score array
+    g_score = array("d", [float('inf')]) * N
     g_score[start] = 0
-    f_score = { (r, c): float('inf') for r in range(maze.rows) for c in range(maze.cols) }
-    f_score[start] = heuristic(start, end)
-    
-    open_set_hash = {start}
-    visited = set()
 
     nodes_expanded = 0
-    max_frontier_size = len(open_set_hash)
+    max_frontier_size = len(open_set)
 
-    while not open_set.empty():
-        current = open_set.get()[1]
-        open_set_hash.remove(current)
-        nodes_expanded += 1
-        max_frontier_size = max(max_frontier_size, len(open_set_hash))
-        visited.add(current)
+    # Expanded cells in order; animate_search's trace is rebuilt from them
+    # and came_from after the search (see utils.expansion_steps).
+    order = array("i")
 
-        # Visualize the A* search state
-        maze.draw(win)
-        for cell in visited:
-            highlight_cell(win, cell, BLUE, maze.cell_size)
-        for cell in open_set_hash:
-            highlight_cell(win, cell, ORANGE, maze.cell_size)
-        highlight_cell(win, current, PURPLE, maze.cell_size)
-        pygame.display.update()
-        pygame.time.delay(DELAY)
+    while open_set:
+        _, _, g, current = heapq.heappop(open_set)
+        if g > g_score[current]:
+            continue  # Stale entry, superseded by a cheaper path
+        nodes_expanded += 1
+        order.append(current)
 
         if current == end:
             break
 
-        for neighbor in get_neighbors_coord(current, maze):
+        for neighbor in maze.neighbor_indices[current]:
             tentative_g = g_score[current] + 1  # Cost of 1 for each move
             if tentative_g < g_score[neighbor]:
                 came_from[neighbor] = current
                 g_score[neighbor] = tentative_g
-                f_score[neighbor] = tentative_g + heuristic(neighbor, end)
-                if neighbor not in open_set_hash:
-                    open_set.put((f_score[neighbor], neighbor))
-                    open_set_hash.add(neighbor)
-                    max_frontier_size = max(max_frontier_size, len(open_set_hash))
+                f = tentative_g + heuristic(divmod(neighbor, cols), end_coord)
+                heapq.heappush(open_set, (f, next(counter), tentative_g, neighbor))
+
+        frontier_size = len(open_set)
+        if frontier_size > max_frontier_size:
+            max_frontier_size = frontier_size
+
+    # Length of the final solution path, and its cells on demand
+    steps_taken, path = path_length_and_iter(came_from, start, end, cols)
+    steps = expansion_steps(order, came_from, maze)
+    return steps_taken, path, steps, nodes_expanded, max_frontier_size
 
-    # Reconstruct and animate the final solution path
-    path = reconstruct_path(came_from, start, end)
-    for cell in path:
-        maze.draw(win)
-        for path_cell in path:
-            highlight_cell(win, path_cell, GREEN, maze.cell_size)
-        pygame.display.update()
-        pygame.time.delay(DELAY)
+def solve_astar(maze, win):
+    """
+    Solve the maze using the A* search algorithm and animate the process.
+    Uses the Manhattan distance as the heuristic.
+    The search runs to completion first; its trace is then replayed on win.
     
-    return (len(path), nodes_expanded, max_frontier_size)
+    Parameters:
+        maze : Maze object.
+        win  : Pygame window, or None to skip the animation.
+
+    Returns a tuple: (steps_taken, nodes_expanded, max_frontier_size), where:
+        - steps_taken: number of cells in the final optimal path.
+        - nodes_expanded: number of nodes expanded during the search.
+        - max_frontier_size: maximum number of nodes in the frontier at any point during the search.
+    """
+    steps_taken, path, steps, nodes_expanded, max_frontier_size = search_astar(maze)
+    if win is not None:
+        animate_search(win, maze, steps, path)
+    return (steps_taken, nodes_expanded, max_frontier_size)
@@ -1,60 +1,77 @@
-import pygame
+from array import array
 from collections import deque
-from maze_generator import highlight_cell, get_neighbors_coord, reconstruct_path, DELAY, BLUE, ORANGE, PURPLE, GREEN
+from maze_generator import animate_search
+from utils import expansion_steps, path_length_and_iter
 
-def solve_bfs(maze, win):
+def search_bfs(maze):
     """
-    Solve the maze using Breadth-First Search (BFS) and animate the search.
-    Parameters:
-        maze : Maze object.
-        win  : Pygame window
+    Search the maze with Breadth-First Search (BFS) from the top-left to the
+    bottom-right cell, without drawing anything.
 
-    Returns a tuple: (steps_taken, nodes_expanded, max_frontier_size), where:
-        - steps_taken: number of cells in the final optimal path.
+    Returns a tuple (steps_taken, path, steps, nodes_expanded, max_frontier_size), where:
+        - steps_taken: number of cells in the final path.
+        - path: iterator over the path's (row, col) cells (see utils.path_length_and_iter).
+        - steps: the expansion order for animate_search, as an iterator of
+          (cell index, list of cell indices added to the frontier) pairs.
         - nodes_expanded: number of nodes expanded during the search.
         - max_frontier_size: maximum number of nodes in the frontier at any point during the search.
     """
-    start = (0, 0)
-    end = (maze.rows - 1, maze.cols - 1)
+    # Cells are tracked by flat index row*cols + col: flags in a bytearray and
+    # predecessors in an int32 array (-1 for none), instead of tuple-keyed sets/dicts.
+    cols = maze.cols
+    N = maze.rows * cols
+    start = 0
+    end = N - 1
     queue = deque([start])
-    came_from = {start: None}
-    visited = {start}
+    came_from = array("i", [-1]) * N
+    visited = bytearray(N)
+    visited[start] = 1
     
     nodes_expanded = 0
     max_frontier_size = len(queue)
 
+    # Expanded cells in order; animate_search's trace is rebuilt from them
+    # and came_from after the search (see utils.expansion_steps).
+    order = array("i")
+
     while queue:
         current = queue.popleft()
         nodes_expanded += 1
-        max_frontier_size = max(max_frontier_size, len(queue))
-        
-        # Visualize the current search state
-        maze.draw(win)
-        for cell in visited:
-            highlight_cell(win, cell, BLUE, maze.cell_size)
-        for cell in queue:
-            highlight_cell(win, cell, ORANGE, maze.cell_size)
-        highlight_cell(win, current, PURPLE, maze.cell_size)
-        pygame.display.update()
-        pygame.time.delay(DELAY)
+        order.append(current)
 
         if current == end:
             break
 
-        for neighbor in get_neighbors_coord(current, maze):
-            if neighbor not in visited:
-                visited.add(neighbor)
+        for neighbor in maze.neighbor_indices[current]:
+            if not visited[neighbor]:
+                visited[neighbor] = 1
                 came_from[neighbor] = current
                 queue.append(neighbor)
-                max_frontier_size = max(max_frontier_size, len(queue))
-
-    # Reconstruct and animate the final solution path
-    path = reconstruct_path(came_from, start, end)
-    for cell in path:
-        maze.draw(win)
-        for path_cell in path:
-            highlight_cell(win, path_cell, GREEN, maze.cell_size)
-        pygame.display.update()
-        pygame.time.delay(DELAY)
+
+        frontier_size = len(queue)
+        if frontier_size > max_frontier_size:
+            max_frontier_size = frontier_size
+
+    # Length of the final solution path, and its cells on demand
+    steps_taken, path = path_length_and_iter(came_from, start, end, cols)
+    steps = expansion_steps(order, came_from, maze)
+    return steps_taken, path, steps, nodes_expanded, max_frontier_size
+
+def solve_bfs(maze, win):
+    """
+    Solve the maze using Breadth-First Search (BFS) and animate the search.
+    The search runs to completion first; its trace is then replayed on win.
     
-    return (len(path), nodes_expanded, max_frontier_size)
+    Parameters:
+        maze : Maze object.
+        win  : Pygame window, or None to skip the animation.
+
+    Returns a tuple: (steps_taken, nodes_expanded, max_frontier_size), where:
+        - steps_taken: number of cells in the final optimal path.
+        - nodes_expanded: number of nodes expanded during the search.
+        - max_frontier_size: maximum number of nodes in the frontier at any point during the search.
+    """
+    steps_taken, path, steps, nodes_expanded, max_frontier_size = search_bfs(maze)
+    if win is not None:
+        animate_search(win, maze, steps, path)
+    return (steps_taken, nodes_expanded, max_frontier_size)
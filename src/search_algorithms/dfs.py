@@ -1,61 +1,217 @@
-import pygame
-from maze_generator import highlight_cell, get_neighbors_coord, reconstruct_path, DELAY, BLUE, ORANGE, PURPLE, GREEN
+import numpy as np
+from maze_core import njit
+from maze_generator import animate_search
+from utils import expansion_steps, path_length_and_iter
+
+# The DFS kernels are compiled for these explicit signatures when this module
+# is imported (or loaded from Numba's on-disk cache), rather than on their first
+# call, so no compilation time ends up inside a timed search.
+_DFS_CORE_SIGNATURE = "Tuple((i4[::1], i4[::1], i8))(i4[:, ::1], i8, i8)"
+_DFS_BIDIR_CORE_SIGNATURE = "Tuple((i4[::1], i4[::1], i8, i8, i8))(i4[:, ::1], i8, i8)"
+
+@njit(_DFS_CORE_SIGNATURE, cache=True)
+def _dfs_core(adj, start, end):
+    """
+    Depth-first search over the Maze.adj neighbor table from cell index start
+    to end, pushing the open neighbors of each expanded cell in U, R, D, L
+    order. Every cell is pushed at most once, so the stack is preallocated.
+
+    Returns (came_from, order, max_frontier): came_from is an int32 array of
+    each cell's predecessor (-1 for none), order the int32 array of expanded
+    cells in expansion order, and max_frontier the largest stack size reached.
+    """
+    N = adj.shape[0]
+    stack = np.empty(N, dtype=np.int32)
+    stack[0] = start
+    top = 1
+    in_stack = np.zeros(N, dtype=np.uint8)  # Mirror of stack for O(1) membership tests
+    in_stack[start] = 1
+    visited = np.zeros(N, dtype=np.uint8)
+    came_from = np.full(N, -1, dtype=np.int32)
+    order = np.empty(N, dtype=np.int32)
+    n = 0
+    max_frontier = 1
+
+    while top > 0:
+        top -= 1
+        current = stack[top]
+        in_stack[current] = 0
+        visited[current] = 1
+        order[n] = current
+        n += 1
+
+        if current == end:
+            break
+
+        for k in range(4):
+            j = adj[current, k]
+            if j >= 0 and visited[j] == 0 and in_stack[j] == 0:
+                came_from[j] = current
+                stack[top] = j
+                top += 1
+                in_stack[j] = 1
+
+        # The frontier only shrinks on pops, so it peaks after a step's pushes
+        if top > max_frontier:
+            max_frontier = top
+
+    return came_from, order[:n], max_frontier
+
+@njit(_DFS_BIDIR_CORE_SIGNATURE, cache=True)
+def _dfs_bidir_core(adj, start, end):
+    """
+    Two depth-first searches over the Maze.adj neighbor table, one from start
+    and one from end, expanding a cell from each in turn. Each cell is claimed
+    by the search that pushes it; the searches have met once one of them
+    expands a cell next to a cell claimed by the other.
+
+    Returns (came_from, order, max_frontier, meet_start, meet_end): came_from
+    is an int32 array of each cell's predecessor in the search that claimed it
+    (-1 for none), order the int32 array of expanded cells of both searches in
+    expansion order, max_frontier the largest combined stack size reached, and
+    meet_start/meet_end the adjacent cells where the searches from start and
+    from end met (both -1 if they never did).
+    """
+    N = adj.shape[0]
+    stacks = np.empty((2, N), dtype=np.int32)
+    stacks[0, 0] = start
+    stacks[1, 0] = end
+    tops = np.ones(2, dtype=np.int64)
+    owner = np.zeros(N, dtype=np.uint8)  # 0 unclaimed, 1 search from start, 2 search from end
+    owner[start] = 1
+    owner[end] = 2
+    came_from = np.full(N, -1, dtype=np.int32)
+    order = np.empty(N, dtype=np.int32)
+    n = 0
+    max_frontier = 2
+    meet_start = -1
+    meet_end = -1
+    if start == end:
+        order[0] = start
+        return came_from, order[:1], 1, start, end
+
+    side = 0
+    while tops[0] > 0 or tops[1] > 0:
+        if tops[side] == 0:
+            side = 1 - side
+        tops[side] -= 1
+        current = stacks[side, tops[side]]
+        order[n] = current
+        n += 1
+
+        for k in range(4):
+            j = adj[current, k]
+            if j < 0:
+                continue
+            if owner[j] == 0:
+                came_from[j] = current
+                stacks[side, tops[side]] = j
+                tops[side] += 1
+                owner[j] = side + 1
+            elif owner[j] != side + 1:
+                if side == 0:
+                    meet_start, meet_end = current, j
+                else:
+                    meet_start, meet_end = j, current
+                break
+        if meet_start >= 0:
+            break
+
+        if tops[0] + tops[1] > max_frontier:
+            max_frontier = tops[0] + tops[1]
+        side = 1 - side
+
+    return came_from, order[:n], max_frontier, meet_start, meet_end
+
+def search_dfs(maze):
+    """
+    Search the maze with Depth-First Search (DFS) from the top-left to the
+    bottom-right cell, without drawing anything.
+
+    Returns a tuple (steps_taken, path, steps, nodes_expanded, max_frontier_size), where:
+        - steps_taken: number of cells in the final path.
+        - path: iterator over the path's (row, col) cells (see utils.path_length_and_iter).
+        - steps: the expansion order for animate_search, as an iterator of
+          (cell index, list of cell indices added to the frontier) pairs.
+        - nodes_expanded: number of nodes expanded during the search.
+        - max_frontier_size: maximum number of nodes in the frontier at any point during the search.
+
+    The search itself runs in the compiled _dfs_core kernel.
+    """
+    cols = maze.cols
+    start = 0
+    end = maze.rows * cols - 1
+    came_from, order, max_frontier_size = _dfs_core(maze.adj, start, end)
+    nodes_expanded = order.shape[0]
+    came_from = came_from.tolist()
+    # The trace is rebuilt from the search tree only if it is replayed.
+    steps = expansion_steps(order, came_from, maze)
+
+    # Length of the final solution path, and its cells on demand
+    steps_taken, path = path_length_and_iter(came_from, start, end, cols)
+    return steps_taken, path, steps, nodes_expanded, max_frontier_size
+
+def search_dfs_bidir(maze):
+    """
+    Search the maze with two Depth-First Searches, one from each end, that
+    take turns expanding a cell and stop where they meet, without drawing
+    anything. On long paths each search only has to cover about half of it.
+
+    Returns the same tuple as search_dfs; the path joins the branch of the
+    search from the top-left cell to the meeting point with the branch of
+    the search from the bottom-right cell.
+    """
+    cols = maze.cols
+    start = 0
+    end = maze.rows * cols - 1
+    came_from, order, max_frontier_size, meet_start, meet_end = _dfs_bidir_core(maze.adj, start, end)
+    nodes_expanded = order.shape[0]
+    came_from = came_from.tolist()
+    steps = expansion_steps(order, came_from, maze)
+
+    if meet_start < 0:
+        # The ends are not connected: report the search from the top-left alone.
+        steps_taken, path = path_length_and_iter(came_from, start, end, cols)
+        return steps_taken, path, steps, nodes_expanded, max_frontier_size
+
+    # Each branch is measured from its own end, so the search from the
+    # bottom-right yields its cells from end to meet_end and is reversed.
+    head_length, head = path_length_and_iter(came_from, start, meet_start, cols)
+    tail_length, tail = path_length_and_iter(came_from, end, meet_end, cols)
+
+    def path():
+        yield from head
+        if meet_end != meet_start:
+            yield from reversed(list(tail))
+
+    steps_taken = head_length + tail_length if meet_end != meet_start else head_length
+    return steps_taken, path(), steps, nodes_expanded, max_frontier_size
 
 def solve_dfs(maze, win):
     """
     Solve the maze using Depth-First Search (DFS) and animate the search.
+    The search runs to completion first; its trace is then replayed on win.
     
     Parameters:
         maze : Maze object.
-        win  : Pygame window
+        win  : Pygame window, or None to skip the animation.
 
     Returns a tuple: (steps_taken, nodes_expanded, max_frontier_size), where:
         - steps_taken: number of cells in the final optimal path.
         - nodes_expanded: number of nodes expanded during the search.
         - max_frontier_size: maximum number of nodes in the frontier at any point during the search.
-        
     """
-    start = (0, 0)
-    end = (maze.rows - 1, maze.cols - 1)
-    stack = [start]
-    came_from = {start: None}
-    visited = set()
-    
-    nodes_expanded = 0
-    max_frontier_size = len(stack)
-
-    while stack:
-        current = stack.pop()
-        nodes_expanded += 1
-        max_frontier_size = max(max_frontier_size, len(stack))
-        visited.add(current)
-
-        # Visualize the current state of the search
-        maze.draw(win)
-        for cell in visited:
-            highlight_cell(win, cell, BLUE, maze.cell_size)
-        for cell in stack:
-            highlight_cell(win, cell, ORANGE, maze.cell_size)
-        highlight_cell(win, current, PURPLE, maze.cell_size)
-        pygame.display.update()
-        pygame.time.delay(DELAY)
+    steps_taken, path, steps, nodes_expanded, max_frontier_size = search_dfs(maze)
+    if win is not None:
+        animate_search(win, maze, steps, path)
+    return (steps_taken, nodes_expanded, max_frontier_size)
 
-        if current == end:
-            break
-
-        for neighbor in get_neighbors_coord(current, maze):
-            if neighbor not in visited and neighbor not in stack:
-                came_from[neighbor] = current
-                stack.append(neighbor)
-                max_frontier_size = max(max_frontier_size, len(stack))
-
-    # Reconstruct and animate the final solution path
-    path = reconstruct_path(came_from, start, end)
-    for cell in path:
-        maze.draw(win)
-        for path_cell in path:
-            highlight_cell(win, path_cell, GREEN, maze.cell_size)
-        pygame.display.update()
-        pygame.time.delay(DELAY)
-    
-    return (len(path), nodes_expanded, max_frontier_size)
+def solve_dfs_bidir(maze, win):
+    """
+    Solve the maze with bidirectional Depth-First Search (see search_dfs_bidir)
+    and animate the search; takes and returns the same as solve_dfs.
+    """
+    steps_taken, path, steps, nodes_expanded, max_frontier_size = search_dfs_bidir(maze)
+    if win is not None:
+        animate_search(win, maze, steps, path)
+    return (steps_taken, nodes_expanded, max_frontier_size)
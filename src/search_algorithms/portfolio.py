@@ -0,0 +1,68 @@
+import multiprocessing
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from maze_generator import Maze
+from search_algorithms.dfs import search_dfs
+from search_algorithms.bfs import search_bfs
+from search_algorithms.astar import search_astar
+
+# Searches the portfolio can race, by the algorithm names used in the results.
+SEARCHES = {"DFS": search_dfs, "BFS": search_bfs, "ASTAR": search_astar}
+
+def _run_search(algorithm, rows, cols, walls):
+    """
+    Worker: rebuild the maze from its wall bits (a Maze holds pygame surfaces,
+    which cannot be sent between processes), run one search on it and return
+    (algorithm, execution_time, steps_taken, path, nodes_expanded, max_frontier_size)
+    with the path as a list of (row, col) cells.
+    """
+    maze = Maze(rows, cols, 1)
+    maze.walls[:] = walls
+    maze.precompute_adjacency()
+    start_ns = time.perf_counter_ns()
+    steps_taken, path, _, nodes_expanded, max_frontier_size = SEARCHES[algorithm](maze)
+    execution_time = (time.perf_counter_ns() - start_ns) / 1e9
+    return algorithm, execution_time, steps_taken, list(path), nodes_expanded, max_frontier_size
+
+def portfolio_pool(algorithms=("DFS", "BFS", "ASTAR")):
+    """
+    Return a process pool with one worker per algorithm, to be reused by every
+    search_portfolio race of a run and shut down by the caller. Workers are
+    started through a fork server (spawned where that is unavailable), so they
+    are never forked from a process with running threads such as main's
+    memory sampler.
+    """
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+    return ProcessPoolExecutor(max_workers=len(algorithms), mp_context=context)
+
+def search_portfolio(maze, pool, algorithms=("DFS", "BFS", "ASTAR")):
+    """
+    Race several searches on the maze in the workers of pool (see
+    portfolio_pool) and return as soon as the first one finishes, without
+    drawing anything. Searches that have not started yet are cancelled; ones
+    already running are left to finish in the background.
+
+    Returns (winner, losers): winner is the tuple of the winning search,
+    (algorithm, execution_time, steps_taken, path, nodes_expanded, max_frontier_size),
+    where execution_time is the search time inside its worker and path is a
+    list of (row, col) cells; losers is a list of (algorithm, future) pairs
+    for the other searches, to be passed to finish_portfolio.
+    """
+    futures = [(algorithm, pool.submit(_run_search, algorithm, maze.rows, maze.cols, maze.walls))
+               for algorithm in algorithms]
+    done, _ = wait([future for _, future in futures], return_when=FIRST_COMPLETED)
+    winner = next(iter(done))
+    losers = [(algorithm, future) for algorithm, future in futures if future is not winner]
+    for _, future in losers:
+        future.cancel()
+    return winner.result(), losers
+
+def finish_portfolio(losers):
+    """
+    Wait for the losing searches of a search_portfolio race to finish.
+    Returns a list of (algorithm, result) pairs in race order, where result is
+    a search tuple like the winner's, or None if the search was cancelled
+    before it started.
+    """
+    return [(algorithm, None if future.cancelled() else future.result()) for algorithm, future in losers]
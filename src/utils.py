@@ -1,5 +1,8 @@
 import os
 import csv
+import atexit
+import numpy as np
+from collections import deque
 
 # Define the CSV file location and header.
 RESULTS_FILE = os.path.join("data", "results.csv")
@@ -13,54 +16,197 @@ HEADER = [
     "Max Frontier Size\\Total Evaluation Iteration"
 ]
 
+# Action names in the order of the Maze.adj columns; MDP policies stored as
+# arrays hold the index of the action in this string (-1 for no action).
+ACTIONS = "URDL"
+
+# (row, col) offset of each action, for following a policy without branching on it.
+_DELTAS = {"U": (-1, 0), "R": (0, 1), "D": (1, 0), "L": (0, -1)}
+
 def get_possible_actions(maze, state):
     """
     Given a maze and a state (r, c), return a list of tuples (action, next_state)
     for all available actions from that state (for mdp algorithms).
     
-    The maze Cell's walls are assumed to be in order [top, right, bottom, left].
-    An action "U" is available if there is no top wall, "R" if no right wall, etc.
+    The maze walls are packed per cell as bits [top, right, bottom, left], and
+    Maze.adj already holds the neighbor each open side leads to, so the actions
+    are read from the state's adj row ("U" if there is no top wall, and so on).
     """
     r, c = state
-    actions = []
-    cell = maze.grid[r][c]
-    # Up
-    if not cell.walls[0] and r > 0:
-        actions.append(("U", (r - 1, c)))
-    # Right
-    if not cell.walls[1] and c < maze.cols - 1:
-        actions.append(("R", (r, c + 1)))
-    # Down
-    if not cell.walls[2] and r < maze.rows - 1:
-        actions.append(("D", (r + 1, c)))
-    # Left
-    if not cell.walls[3] and c > 0:
-        actions.append(("L", (r, c - 1)))
-    return actions
+    return [(ACTIONS[k], divmod(j, maze.cols))
+            for k, j in enumerate(maze.adj[r * maze.cols + c].tolist()) if j >= 0]
+
+def transition_table(maze):
+    """
+    Return (nbr, terminal) for the maze MDP: nbr[i, k] is the index of the
+    state reached by action k (see ACTIONS) from state i = r*cols + c, or -1 if
+    blocked, and terminal is the index of (maze.rows-1, maze.cols-1), which has
+    no actions. nbr is a fresh int32 copy of Maze.adj.
+    """
+    terminal = maze.rows * maze.cols - 1
+    nbr = maze.adj.copy()
+    nbr[terminal] = -1
+    return nbr, terminal
+
+def policy_to_dict(policy, maze):
+    """
+    Convert a policy array of action codes indexed by r*cols + c into the
+    {(r, c): action} form used by extract_policy_path (None for no action).
+    """
+    return {divmod(i, maze.cols): ACTIONS[code] if code >= 0 else None
+            for i, code in enumerate(policy.tolist())}
+
+def morton_order(rows, cols):
+    """
+    Return an int32 array of every state index (r*cols + c) in Morton (z-curve)
+    order, which visits the grid in small square blocks so that the vertical
+    neighbors of a state are usually close to it in memory too.
+    """
+    r, c = np.divmod(np.arange(rows * cols, dtype=np.int64), cols)
+    code = np.zeros(rows * cols, dtype=np.int64)
+    for bit in range(max(rows, cols).bit_length()):
+        code |= ((c >> bit) & 1) << (2 * bit)
+        code |= ((r >> bit) & 1) << (2 * bit + 1)
+    return np.argsort(code, kind="stable").astype(np.int32)
+
+def bfs_tree(maze, source):
+    """
+    Breadth-first search over the maze passages from the state index `source`
+    (r*cols + c), using the Maze.adj neighbor table.
+
+    Returns (order, parent, depth) where:
+      - order : int32 array of the reached state indices by increasing distance.
+      - parent: int32 array giving each state's predecessor towards the source
+                (-1 for the source and for unreached states).
+      - depth : int32 array of passage distances to the source (-1 if unreached).
+    """
+    # The walk indexes plain Python lists, which is much faster than indexing
+    # NumPy arrays one element at a time; they become int32 arrays at the end.
+    N = maze.rows * maze.cols
+    parent = [-1] * N
+    depth = [-1] * N
+    depth[source] = 0
+    order = [source]
+    queue = deque(order)
+    adj = maze.adj.tolist()
+    while queue:
+        i = queue.popleft()
+        d = depth[i] + 1
+        for j in adj[i]:
+            if j >= 0 and depth[j] < 0:
+                parent[j] = i
+                depth[j] = d
+                order.append(j)
+                queue.append(j)
+    return (np.array(order, dtype=np.int32), np.array(parent, dtype=np.int32),
+            np.array(depth, dtype=np.int32))
+
+def bfs_order(maze, source):
+    """
+    Return an int32 array of every state index ordered by increasing passage
+    distance from `source` (see bfs_tree); states that cannot reach it are
+    appended at the end.
+    """
+    order, parent, depth = bfs_tree(maze, source)
+    return np.concatenate((order, np.flatnonzero(depth < 0).astype(np.int32)))
+
+def solve_shortest_path_mdp(maze, gamma):
+    """
+    Solve the maze MDP (reward -1 per move, deterministic moves, single terminal
+    state at (maze.rows-1, maze.cols-1)) in closed form with one BFS from the
+    terminal. A state at distance d from the terminal has the optimal value
+    V = -(1 - gamma**d) / (1 - gamma), and its optimal action moves to its BFS
+    parent.
+
+    Returns (V, policy) in the array form used by the MDP solvers: V is a
+    float64 array and policy an int8 array of action codes (see ACTIONS),
+    both indexed by r*cols + c. The terminal and states that cannot reach it
+    get V = 0 and no action (-1).
+    """
+    terminal = maze.rows * maze.cols - 1
+    order, parent, depth = bfs_tree(maze, terminal)
+    reached = depth >= 0
+    V = np.zeros(depth.shape[0])
+    V[reached] = -(1.0 - np.power(gamma, depth[reached])) / (1.0 - gamma)
+    # The action towards the parent is the Maze.adj column holding its index.
+    moves = parent >= 0
+    policy = np.full(depth.shape[0], -1, dtype=np.int8)
+    policy[moves] = np.argmax(maze.adj[moves] == parent[moves, None], axis=1)
+    return V, policy
+
+def path_length_and_iter(came_from, start, end, cols):
+    """
+    Measure the path that a predecessor array encodes, without building it.
+
+    Parameters:
+      came_from : flat array mapping each cell index (row*cols + col) to the index
+                  of the cell it was reached from (-1 where there is none).
+      start, end: cell indices the path runs between.
+
+    Returns (length, cells): the number of cells on the path, counted by
+    walking back from end, and an iterator that yields the path's (row, col)
+    cells from start to end. The cells are only collected if the iterator is
+    consumed, so callers that just need the length allocate nothing.
+    """
+    length = 0
+    i = end
+    while i >= 0:
+        length += 1
+        if i == start:
+            break
+        i = came_from[i]
+
+    def cells():
+        path_stack = []
+        i = end
+        while i >= 0:
+            path_stack.append(i)
+            if i == start:
+                break
+            i = came_from[i]
+        for i in reversed(path_stack):
+            yield divmod(i, cols)
+
+    return length, cells()
+
+def expansion_steps(order, came_from, maze):
+    """
+    Rebuild a search's expansion trace for animate_search from its search tree.
+
+    Parameters:
+      order     : int array (NumPy or array('i')) of the expanded cell indices,
+                  in expansion order.
+      came_from : flat array mapping each cell index to the index of the cell
+                  that pushed it onto the frontier (-1 where there is none).
+
+    Returns an iterator of (cell index, list of cell indices it added to the
+    frontier) pairs. Each cell is taken to be pushed once, by the expansion
+    that set its came_from entry, which holds for every search in a perfect
+    maze; the pairs are only built if the iterator is consumed.
+    """
+    neighbor_indices = maze.neighbor_indices
+    for current in order.tolist():
+        yield current, [j for j in neighbor_indices[current] if came_from[j] == current]
 
 def extract_policy_path(policy, maze):
     """
     Function to extract the optimal path from (0,0) to terminal based on the given policy (for mdp_algorithms).
+    Returns None if the policy does not lead there: a state without an action
+    ends the path early, and a path that has not reached the terminal after
+    visiting rows*cols states is following a cycle in the policy.
     """
     path = []
     state = (0, 0)
     terminal = (maze.rows - 1, maze.cols - 1)
+    max_length = maze.rows * maze.cols
     while state != terminal:
+        if len(path) >= max_length:
+            return None
         path.append(state)
-        action = policy.get(state)
-        if action is None:
-            break
-        r, c = state
-        if action == "U":
-            state = (r - 1, c)
-        elif action == "R":
-            state = (r, c + 1)
-        elif action == "D":
-            state = (r + 1, c)
-        elif action == "L":
-            state = (r, c - 1)
-        else:
-            break
+        dr, dc = _DELTAS.get(policy.get(state), (None, None))
+        if dr is None:
+            return None
+        state = (state[0] + dr, state[1] + dc)
     path.append(terminal)
     return path
 
@@ -74,6 +220,46 @@ def initialize_results_file(file_path=RESULTS_FILE):
             writer = csv.writer(f)
             writer.writerow(HEADER)
 
+class ResultsLogger:
+    """
+    Append result rows to a results CSV through one open, block-buffered file
+    and a single csv.writer, instead of opening the file for every row.
+    The file is created with the header when the logger is constructed.
+    Rows reach the file on flush() or close(); the logger can also be used
+    as a context manager.
+    """
+    def __init__(self, file_path=RESULTS_FILE):
+        initialize_results_file(file_path)
+        self.file_path = file_path
+        self.file = open(file_path, mode='a', newline='')
+        self.writer = csv.writer(self.file)
+
+    def log(self, row):
+        self.writer.writerow(row)
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+# Loggers shared by log_result, one per results file, closed at exit.
+_loggers = {}
+
+def get_results_logger(file_path=RESULTS_FILE):
+    """Return the shared ResultsLogger for file_path, opening it on first use."""
+    logger = _loggers.get(file_path)
+    if logger is None:
+        logger = _loggers[file_path] = ResultsLogger(file_path)
+        atexit.register(logger.close)
+    return logger
+
 def log_result(algorithm, maze_size, execution_time, steps_taken, memory_usage, nodes_expanded, max_frontier_size, file_path=RESULTS_FILE):
     """
     Append a new result line to the CSV file.
@@ -88,13 +274,13 @@ def log_result(algorithm, maze_size, execution_time, steps_taken, memory_usage,
                               For MDP methods: iteration count or policy improvement count.
       max_frontier_size (int): For classical search: maximum frontier size;
                                For MDP methods: total evaluation iterations (or 0).
+
+    The row goes through the shared logger for file_path (see get_results_logger),
+    so it is buffered until that logger is flushed or closed.
     """
-    initialize_results_file(file_path)
     if isinstance(maze_size, tuple):
         maze_size = f"{maze_size[0]}x{maze_size[1]}"
-    with open(file_path, mode='a', newline='') as f:
-        writer = csv.writer(f)
-        writer.writerow([algorithm, maze_size, execution_time, steps_taken, memory_usage, nodes_expanded, max_frontier_size])
+    get_results_logger(file_path).log([algorithm, maze_size, execution_time, steps_taken, memory_usage, nodes_expanded, max_frontier_size])
 
 def compare_algorithms(maze_size, file_path=RESULTS_FILE):
     """
@@ -106,15 +292,26 @@ def compare_algorithms(maze_size, file_path=RESULTS_FILE):
     Returns:
       List of dictionaries, one per logged result for the specified maze size.
     """
-    initialize_results_file(file_path)
+    # Make rows still buffered in the shared logger visible to the reader.
+    if file_path in _loggers:
+        _loggers[file_path].flush()
+    # Reading never creates the file: with no results yet there is nothing to compare.
+    if not os.path.exists(file_path):
+        return []
     if isinstance(maze_size, tuple):
         maze_size = f"{maze_size[0]}x{maze_size[1]}"
     results = []
     with open(file_path, mode='r', newline='') as f:
-        reader = csv.DictReader(f)
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            return results
+        # Filter on the raw rows; only the matching ones are turned into dicts.
+        size_idx = header.index("Maze Size")
         for row in reader:
-            if row["Maze Size"] == maze_size:
-                results.append(row)
+            # Blank lines come back as empty rows; skip them and any short row.
+            if len(row) > size_idx and row[size_idx] == maze_size:
+                results.append(dict(zip(header, row)))
     return results
 
 if __name__ == "__main__":
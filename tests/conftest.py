@@ -0,0 +1,7 @@
+import os
+import sys
+
+# The modules import each other by their names under src/, as when running src/main.py.
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+# Mazes build pygame surfaces; no display is needed for that.
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
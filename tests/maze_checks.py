@@ -0,0 +1,25 @@
+from maze_generator import Maze
+from utils import solve_shortest_path_mdp, extract_policy_path, policy_to_dict
+
+# (rows, cols, seed) of the mazes the solvers are checked on. The 30x20 maze
+# with seed 1 has a 373-step path, longer than float64 values can resolve.
+MAZES = [(15, 15, 0), (15, 15, 1), (30, 20, 0), (30, 20, 1)]
+
+def make_maze(rows, cols, seed):
+    """Generate the maze for seed without drawing it."""
+    maze = Maze(rows, cols, 1, rng_seed=seed)
+    maze.generate_maze(None, animate=False)
+    return maze
+
+def shortest_path(maze):
+    """The path given by the closed-form MDP solution, as a list of (row, col) cells."""
+    _, policy = solve_shortest_path_mdp(maze, 0.9)
+    return extract_policy_path(policy_to_dict(policy, maze), maze)
+
+def assert_valid_path(maze, path):
+    """Check that path runs from (0, 0) to the bottom-right cell through open passages."""
+    path = list(path)
+    assert path[0] == (0, 0)
+    assert path[-1] == (maze.rows - 1, maze.cols - 1)
+    for cell, nxt in zip(path, path[1:]):
+        assert nxt in maze.neighbors[cell[0] * maze.cols + cell[1]]
@@ -0,0 +1,87 @@
+import numpy as np
+import pytest
+
+from maze_checks import MAZES, assert_valid_path, make_maze, shortest_path
+from mdp_algorithms.policy_iteration import _solve_policy_values, compute_policy_iteration
+from mdp_algorithms.value_iteration import compute_value_iteration
+from utils import extract_policy_path, transition_table
+
+# Float sweeps cannot order states whose values all round to
+# -1 / (1 - gamma), so on the longest maze they may report no path (but
+# never a broken one).
+FLOAT_LIMITED = (30, 20, 1)
+
+def test_extract_policy_path_follows_policy_to_terminal():
+    maze = make_maze(2, 2, 0)
+    policy = {(0, 0): "R", (0, 1): "D", (1, 0): "U", (1, 1): None}
+    assert extract_policy_path(policy, maze) == [(0, 0), (0, 1), (1, 1)]
+
+def test_extract_policy_path_returns_none_on_policy_cycle():
+    maze = make_maze(2, 2, 0)
+    policy = {(0, 0): "R", (0, 1): "L", (1, 0): "U", (1, 1): None}
+    assert extract_policy_path(policy, maze) is None
+
+def test_extract_policy_path_returns_none_on_missing_action():
+    maze = make_maze(2, 2, 0)
+    policy = {(0, 0): None, (0, 1): "D", (1, 0): "R", (1, 1): None}
+    assert extract_policy_path(policy, maze) is None
+
+@pytest.mark.parametrize("maze_spec", MAZES)
+@pytest.mark.parametrize("mode", [{}, {"integer": True}, {"parallel": True}, {"prioritized": True}])
+def test_value_iteration_finds_shortest_path(maze_spec, mode):
+    maze = make_maze(*maze_spec)
+    path, iter_count, _ = compute_value_iteration(maze, **mode)
+    if path is None:
+        assert maze_spec == FLOAT_LIMITED and not (mode.get("integer") or mode.get("prioritized"))
+        return
+    assert_valid_path(maze, path)
+    assert len(path) == len(shortest_path(maze))
+    assert iter_count > 0
+    if mode.get("parallel"):
+        # Each Jacobi sweep settles one more step of distance from the goal.
+        assert iter_count >= len(path)
+
+@pytest.mark.parametrize("maze_spec", MAZES)
+def test_prioritized_value_iteration_backs_up_each_state_once(maze_spec):
+    maze = make_maze(*maze_spec)
+    _, backups, _ = compute_value_iteration(maze, prioritized=True)
+    # Every cell of a perfect maze reaches the goal.
+    assert backups == maze.rows * maze.cols
+
+def test_solve_policy_values_follows_policy_chains():
+    maze = make_maze(2, 2, 0)
+    nbr, _ = transition_table(maze)
+    V = np.zeros(4)
+    # (0, 0) D -> (1, 0) R -> (1, 1) <- D (0, 1)
+    _solve_policy_values(V, np.array([2, 2, 1, -1], dtype=np.int8), nbr, 0.9)
+    assert V.tolist() == pytest.approx([-1.9, -1.0, -1.0, 0.0])
+    # (0, 0) D and (1, 0) U move back and forth forever.
+    _solve_policy_values(V, np.array([2, 2, 0, -1], dtype=np.int8), nbr, 0.9)
+    assert V.tolist() == pytest.approx([-10.0, -1.0, -10.0, 0.0])
+
+@pytest.mark.parametrize("maze_spec", MAZES)
+@pytest.mark.parametrize("direct", [False, True])
+def test_policy_iteration_finds_shortest_path(maze_spec, direct):
+    maze = make_maze(*maze_spec)
+    path, improvements, evaluations = compute_policy_iteration(maze, direct=direct)
+    if path is None:
+        assert maze_spec == FLOAT_LIMITED and not direct
+        return
+    assert_valid_path(maze, path)
+    assert len(path) == len(shortest_path(maze))
+    if direct:
+        assert improvements == evaluations
+
+def test_policy_evaluation_with_zero_theta_stops_at_fixed_point():
+    # No sweep has delta < 0; evaluation must stop once a sweep changes nothing.
+    maze = make_maze(15, 15, 0)
+    path, _, _ = compute_policy_iteration(maze, theta=0)
+    assert_valid_path(maze, path)
+    assert len(path) == len(shortest_path(maze))
+
+@pytest.mark.parametrize("maze_spec", MAZES)
+def test_exact_solutions_agree(maze_spec):
+    maze = make_maze(*maze_spec)
+    path, _, _ = compute_value_iteration(maze, exact=True)
+    assert_valid_path(maze, path)
+    assert compute_policy_iteration(maze, exact=True) == (path, 0, 0)
@@ -0,0 +1,35 @@
+import pytest
+
+from maze_checks import MAZES, assert_valid_path, make_maze, shortest_path
+from search_algorithms.astar import search_astar
+from search_algorithms.bfs import search_bfs
+from search_algorithms.dfs import search_dfs, search_dfs_bidir
+from search_algorithms.portfolio import SEARCHES, finish_portfolio, portfolio_pool, search_portfolio
+
+@pytest.mark.parametrize("maze_spec", MAZES)
+@pytest.mark.parametrize("search", [search_dfs, search_dfs_bidir, search_bfs, search_astar])
+def test_search_finds_shortest_path(maze_spec, search):
+    maze = make_maze(*maze_spec)
+    steps_taken, path, _, nodes_expanded, max_frontier_size = search(maze)
+    path = list(path)
+    assert_valid_path(maze, path)
+    # A perfect maze has a single path, so every search finds the shortest one.
+    assert steps_taken == len(path) == len(shortest_path(maze))
+    assert nodes_expanded > 0 and max_frontier_size > 0
+
+def test_portfolio_reports_winner_and_losers():
+    maze = make_maze(15, 15, 0)
+    expected = len(shortest_path(maze))
+    pool = portfolio_pool()
+    try:
+        for _ in range(2):
+            winner, losers = search_portfolio(maze, pool)
+            outcomes = finish_portfolio(losers)
+            algorithms = [winner[0]] + [algorithm for algorithm, _ in outcomes]
+            assert sorted(algorithms) == sorted(SEARCHES)
+            assert_valid_path(maze, winner[3])
+            assert winner[2] == len(winner[3]) == expected
+            for _, outcome in outcomes:
+                assert outcome is None or outcome[2] == expected
+    finally:
+        pool.shutdown()
@@ -0,0 +1,33 @@
+import os
+import shutil
+
+from utils import compare_algorithms, log_result
+
+SHIPPED_RESULTS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "results.csv")
+
+def test_compare_algorithms_skips_blank_lines(tmp_path):
+    results_file = str(tmp_path / "results.csv")
+    with open(results_file, "w", newline="") as f:
+        f.write("Algorithm,Maze Size,Execution Time\n"
+                "DFS,15x15,0.5\n"
+                "\n"
+                "BFS,15x15,0.7\n"
+                "ASTAR,20x20,0.3\n")
+    results = compare_algorithms((15, 15), file_path=results_file)
+    assert [result["Algorithm"] for result in results] == ["DFS", "BFS"]
+
+def test_compare_algorithms_on_shipped_results(tmp_path):
+    results_file = str(tmp_path / "results.csv")
+    shutil.copy(SHIPPED_RESULTS, results_file)
+    before = compare_algorithms((15, 15), file_path=results_file)
+    assert before and all(result["Maze Size"] == "15x15" for result in before)
+    # Rows still buffered in the shared logger are visible to the comparison.
+    log_result("DFS", (15, 15), 0.1, 10, 0.5, 20, 3, file_path=results_file)
+    after = compare_algorithms("15x15", file_path=results_file)
+    assert len(after) == len(before) + 1
+    assert after[-1]["Algorithm"] == "DFS"
+
+def test_compare_algorithms_without_results_file(tmp_path):
+    results_file = str(tmp_path / "missing.csv")
+    assert compare_algorithms((15, 15), file_path=results_file) == []
+    assert not os.path.exists(results_file)